@@ -0,0 +1,97 @@
+"""
+Compares the per-box annotation code with the cached, batched renderers at 1, 10 and 100 boxes.
+
+    python -m benchmarks.annotation
+"""
+import colorsys
+import random
+import time
+
+import cv2
+import numpy as np
+
+from core.config import cfg
+from core.utils import BboxRenderer, read_class_names
+from renderer import FrameRenderer
+
+
+def legacy_draw_bbox(image, bboxes, classes, show_label=True):
+    # core.utils.draw_bbox before the BboxRenderer
+    num_classes = len(classes)
+    image_h, image_w, _ = image.shape
+    hsv_tuples = [(1.0 * x / num_classes, 1., 1.) for x in range(num_classes)]
+    colors = list(map(lambda x: colorsys.hsv_to_rgb(*x), hsv_tuples))
+    colors = list(map(lambda x: (int(x[0] * 255), int(x[1] * 255), int(x[2] * 255)), colors))
+
+    random.seed(0)
+    random.shuffle(colors)
+    random.seed(None)
+
+    for i, bbox in enumerate(bboxes):
+        coor = np.array(bbox[:4], dtype=np.int32)
+        fontScale = 0.5
+        score = bbox[4]
+        class_ind = int(bbox[5])
+        bbox_color = colors[class_ind]
+        bbox_thick = int(0.6 * (image_h + image_w) / 600)
+        c1, c2 = (coor[0], coor[1]), (coor[2], coor[3])
+        cv2.rectangle(image, c1, c2, bbox_color, bbox_thick)
+
+        if show_label:
+            bbox_mess = '%s: %.2f' % (classes[class_ind], score)
+            t_size = cv2.getTextSize(bbox_mess, 0, fontScale, thickness=bbox_thick // 2)[0]
+            cv2.rectangle(image, c1, (c1[0] + t_size[0], c1[1] - t_size[1] - 3), bbox_color, -1)
+            cv2.putText(image, bbox_mess, (c1[0], c1[1] - 2), cv2.FONT_HERSHEY_SIMPLEX,
+                        fontScale, (0, 0, 0), bbox_thick // 2, lineType=cv2.LINE_AA)
+    return image
+
+
+def legacy_draw_rects(renderer, image, bboxes):
+    # VisionEngine.draw_bbox before the batched FrameRenderer.draw_bbox, five OpenCV calls per box
+    for bbox in bboxes:
+        coordinates = np.array(bbox[:4], dtype=np.int32)
+        renderer.draw_rect(image, (coordinates[0], coordinates[1]), (coordinates[2], coordinates[3]))
+
+
+def random_bboxes(n, image_shape, num_classes, rng):
+    h, w = image_shape[:2]
+    x_min = rng.uniform(0, w - 60, n)
+    y_min = rng.uniform(20, h - 60, n)
+    x_max = x_min + rng.uniform(40, 60, n)
+    y_max = y_min + rng.uniform(40, 60, n)
+    # scores on a coarse grid, the way detections repeat from frame to frame
+    scores = rng.randint(30, 100, n) / 100.
+    classes = rng.randint(0, num_classes, n)
+    return np.stack([x_min, y_min, x_max, y_max, scores, classes], axis=1)
+
+
+def measure(fn, image, runs):
+    times = []
+    for _ in range(runs):
+        frame = np.copy(image)
+        start = time.time()
+        fn(frame)
+        times.append(time.time() - start)
+    return np.mean(times[1:]) * 1000
+
+
+def main(runs=50):
+    classes = read_class_names(cfg.YOLO.CLASSES)
+    image = cv2.imread("images/10.jpg")
+    rng = np.random.RandomState(0)
+    bbox_renderer = BboxRenderer(classes)
+    frame_renderer = FrameRenderer(classes, ["" for _ in classes])
+
+    print("%-8s %14s %14s %14s %14s" % ("boxes", "draw_bbox", "BboxRenderer", "draw_rect", "batched rect"))
+    for n in [1, 10, 100]:
+        bboxes = random_bboxes(n, image.shape, len(classes), rng)
+        print("%-8d %11.3f ms %11.3f ms %11.3f ms %11.3f ms" % (
+            n,
+            measure(lambda frame: legacy_draw_bbox(frame, bboxes, classes), image, runs),
+            measure(lambda frame: bbox_renderer.draw(frame, bboxes), image, runs),
+            measure(lambda frame: legacy_draw_rects(frame_renderer, frame, bboxes), image, runs),
+            measure(lambda frame: frame_renderer.draw_bbox(frame, bboxes), image, runs)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares the np.append gesture sequence with the preallocated FeatureWindow, per frame cost and memory allocated.
+
+    python -m benchmarks.gesture_buffer
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from gesture_buffer import FeatureWindow
+
+
+def legacy_sequence(features):
+    # GestureEngine.run before the FeatureWindow
+    gesture_sequence = np.array([])
+    windows = 0
+    for feature in features:
+        gesture_sequence = np.append(gesture_sequence, feature[:5])
+        gesture_sequence = np.append(gesture_sequence, feature[5:])
+        if len(gesture_sequence) > 270:
+            gesture_sequence[:270].reshape(1, 1, 270)
+            windows += 1
+            gesture_sequence = gesture_sequence[90:]
+    return windows
+
+
+def ring_buffer(features):
+    window = FeatureWindow(270, 90)
+    windows = 0
+    for feature in features:
+        ready = window.push(feature[:5])
+        if window.push(feature[5:]) or ready:
+            window.window().reshape(1, 1, 270)
+            windows += 1
+    return windows
+
+
+def measure(fn, features):
+    start = time.time()
+    windows = fn(features)
+    elapsed = time.time() - start
+
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    fn(features)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # blocks allocated by the loop and still alive when it returns, plus its peak memory
+    blocks = sum(stat.count_diff for stat in after.compare_to(snapshot, "filename"))
+    return elapsed / len(features) * 1e6, peak, blocks, windows
+
+
+def main(frames=10000):
+    features = np.random.RandomState(0).rand(frames, 9)
+    print("%-14s %12s %12s %12s %10s" % ("", "us / frame", "peak bytes", "live blocks", "windows"))
+    for name, fn in [("np.append", legacy_sequence), ("FeatureWindow", ring_buffer)]:
+        print("%-14s %12.2f %12d %12d %10d" % ((name,) + measure(fn, features)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the per-finger gesture feature loop with the bulk NumPy extractor on frames recorded from the Leap.
+Keep a hand or two over the controller while it records.
+
+    LD_PRELOAD=./libLeap.so python -m benchmarks.leap_features
+"""
+import time
+
+import numpy as np
+
+import Leap
+from leap_features import extract_features
+from leap_ingest import FrameListener
+
+
+def legacy_features(frame):
+    # GestureEngine.run before leap_features
+    rows = []
+    for hand in frame.hands:
+        pv = []
+        av = []
+        prev_finger = None
+        c = hand.palm_position
+        m = 1
+        for finger in hand.fingers:
+            if prev_finger:
+                ad = finger.tip_position.distance_to(prev_finger.tip_position)
+                av.append(ad)
+                prev_finger = finger
+            else:
+                prev_finger = finger
+            pd = finger.tip_position.distance_to(c)
+            m = pd if finger.type == Leap.Finger.TYPE_MIDDLE else m
+            pv.append(pd)
+        rows.append(np.concatenate([np.array(pv) / m, np.array(av) / m]))
+    return rows
+
+
+def record(seconds):
+    controller = Leap.Controller()
+    listener = FrameListener(max_frames=100000)
+    controller.add_listener(listener)
+    time.sleep(seconds)
+    controller.remove_listener(listener)
+    frames = []
+    frame = listener.next_frame(timeout=0)
+    while frame is not None:
+        if not frame.hands.is_empty:
+            frames.append(frame)
+        frame = listener.next_frame(timeout=0)
+    return frames
+
+
+def measure(fn, frames, runs):
+    times = []
+    for _ in range(runs):
+        start = time.time()
+        for frame in frames:
+            fn(frame)
+        times.append((time.time() - start) / len(frames))
+    return np.mean(times) * 1e6
+
+
+def main(seconds=5, runs=5):
+    frames = record(seconds)
+    if len(frames) == 0:
+        print("No hands were recorded")
+        return
+    hands = sum(len(frame.hands) for frame in frames)
+    print("%d frames with %d hands" % (len(frames), hands))
+
+    difference = max(np.max(np.abs(np.array(legacy_features(frame)) - extract_features(frame)[1]))
+                     for frame in frames)
+    print("max feature difference: %g" % difference)
+    print("per-finger loop: %8.1f us / frame" % measure(legacy_features, frames, runs))
+    print("bulk extractor:  %8.1f us / frame" % measure(extract_features, frames, runs))
+
+
+if __name__ == '__main__':
+    main()
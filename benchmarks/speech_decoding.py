@@ -0,0 +1,64 @@
+"""
+Compares the per-utterance latency of the WAV file and Kaldi binaries path (save_speech + recognize_speech) with
+the in-process feature extraction of recognize_pcm, on 16 kHz mono recordings of spoken commands.
+
+    python -m benchmarks.speech_decoding /home/darshanakg/speech_commands/new_describe/*.wav
+"""
+import argparse
+import time
+import wave
+
+import numpy as np
+import pyaudio
+
+from zamia.decode_mic import CHUNK, RATE, SpeechRecognizer
+
+
+def read_chunks(path):
+    # the mic chunks speech_recognition would have captured
+    with wave.open(path, 'rb') as wf:
+        frames = wf.readframes(wf.getnframes())
+    size = CHUNK * 2
+    return [frames[i:i + size] for i in range(0, len(frames), size)]
+
+
+def file_path(sr, p, chunks):
+    sr.save_speech(chunks, p)
+    return sr.recognize_speech()
+
+
+def measure(fn, utterances, runs):
+    times = []
+    texts = []
+    for _ in range(runs):
+        for chunks in utterances:
+            start = time.time()
+            texts.append(fn(chunks))
+            times.append(time.time() - start)
+    return np.mean(times) * 1e3, np.percentile(times, 95) * 1e3, texts[:len(utterances)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wavs", nargs="+")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    sr = SpeechRecognizer()
+    p = pyaudio.PyAudio()
+    utterances = [read_chunks(path) for path in args.wavs]
+    seconds = sum(len(b''.join(chunks)) for chunks in utterances) / 2. / RATE / len(utterances)
+    print("%d utterances, %.2f s of audio on average" % (len(utterances), seconds))
+
+    file_mean, file_p95, file_texts = measure(lambda chunks: file_path(sr, p, chunks), utterances, args.runs)
+    pcm_mean, pcm_p95, pcm_texts = measure(sr.recognize_pcm, utterances, args.runs)
+    p.terminate()
+
+    mismatches = sum(a.strip() != b.strip() for a, b in zip(file_texts, pcm_texts))
+    print("transcripts that differ: %d" % mismatches)
+    print("WAV + binaries: %8.1f ms / utterance (p95 %.1f ms)" % (file_mean, file_p95))
+    print("in-process:     %8.1f ms / utterance (p95 %.1f ms)" % (pcm_mean, pcm_p95))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compares the PIL and OpenCV backends of visualize_boxes_and_labels_on_image_array on the same detections.
+
+    python -m benchmarks.visualization
+"""
+import time
+
+import cv2
+import numpy as np
+
+from utils import visualization_utils
+
+
+def random_detections(n, num_classes, rng):
+    ymin = rng.uniform(0.05, 0.85, n)
+    xmin = rng.uniform(0., 0.85, n)
+    boxes = np.stack([ymin, xmin, ymin + rng.uniform(0.05, 0.15, n), xmin + rng.uniform(0.05, 0.15, n)], axis=1)
+    classes = rng.randint(1, num_classes + 1, n)
+    scores = rng.uniform(0.6, 1., n)
+    keypoints = np.stack([boxes[:, [0, 1]], boxes[:, [2, 3]]], axis=1)
+    return boxes, classes, scores, keypoints
+
+
+def measure(fn, image, detections, runs, **kwargs):
+    times = []
+    for _ in range(runs):
+        frame = np.copy(image)
+        start = time.time()
+        fn(frame, *detections, use_normalized_coordinates=True, max_boxes_to_draw=None, **kwargs)
+        times.append(time.time() - start)
+    return np.mean(times[1:]) * 1000, frame
+
+
+def main(runs=20):
+    image = cv2.cvtColor(cv2.imread("images/10.jpg"), cv2.COLOR_BGR2RGB)
+    category_index = {i: {"id": i, "name": "class %d" % i} for i in range(1, 81)}
+    rng = np.random.RandomState(0)
+
+    print("%-8s %14s %14s %10s" % ("boxes", "PIL", "OpenCV", "diff"))
+    for n in [1, 10, 50, 100]:
+        boxes, classes, scores, keypoints = random_detections(n, len(category_index), rng)
+        detections = (boxes, classes, scores, category_index)
+        pil_ms, pil_frame = measure(visualization_utils.visualize_boxes_and_labels_on_image_array,
+                                    image, detections, runs, keypoints=keypoints)
+        cv2_ms, cv2_frame = measure(visualization_utils.visualize_boxes_and_labels_on_image_array_cv2,
+                                    image, detections, runs, keypoints=keypoints)
+        # mean absolute pixel difference, the backends use different fonts and line rasterization
+        difference = np.mean(np.abs(pil_frame.astype(np.int16) - cv2_frame.astype(np.int16)))
+        print("%-8d %11.3f ms %11.3f ms %10.2f" % (n, pil_ms, cv2_ms, difference))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,19 @@ class Config:
         self.ASR = 0
         self.TC = 0
         self.GR = 1
+        self.OG = 0
+        self.YE = 0
+        self.MG = 0
+        self.DC = 0
+        self.SM = 0
+        self.SD = 0
+        self.PH = 0
+        self.MJ = 0
+        self.RC = 0
+        self.RS = 0
+        self.GS = 0
+        self.NM = 0
+        self.SO = 0
 
 
 config = Config()
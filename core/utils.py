@@ -62,40 +62,87 @@ def image_preporcess(image, target_size, gt_boxes=None):
         return image_paded, gt_boxes
 
 
-def draw_bbox(image, bboxes, classes=read_class_names(cfg.YOLO.CLASSES), show_label=True):
+class BboxRenderer:
     """
-    bboxes: [x_min, y_min, x_max, y_max, probability, cls_id] format coordinates.
+    Annotation renderer behind draw_bbox. The class palette is built once, label sizes and label sprites are cached
+    per label text, and the boxes of a frame are drawn with one polylines call per class colour.
     """
 
-    num_classes = len(classes)
-    image_h, image_w, _ = image.shape
-    hsv_tuples = [(1.0 * x / num_classes, 1., 1.) for x in range(num_classes)]
-    colors = list(map(lambda x: colorsys.hsv_to_rgb(*x), hsv_tuples))
-    colors = list(map(lambda x: (int(x[0] * 255), int(x[1] * 255), int(x[2] * 255)), colors))
-
-    random.seed(0)
-    random.shuffle(colors)
-    random.seed(None)
-
-    for i, bbox in enumerate(bboxes):
-        coor = np.array(bbox[:4], dtype=np.int32)
-        fontScale = 0.5
-        score = bbox[4]
-        class_ind = int(bbox[5])
-        bbox_color = colors[class_ind]
+    def __init__(self, classes, font_scale=0.5, max_sprites=1024):
+        self.classes = classes
+        self.font_scale = font_scale
+        self.max_sprites = max_sprites
+        num_classes = len(classes)
+        hsv_tuples = [(1.0 * x / num_classes, 1., 1.) for x in range(num_classes)]
+        colors = list(map(lambda x: colorsys.hsv_to_rgb(*x), hsv_tuples))
+        colors = list(map(lambda x: (int(x[0] * 255), int(x[1] * 255), int(x[2] * 255)), colors))
+        # same order as random.seed(0); random.shuffle(colors), without touching the global generator
+        random.Random(0).shuffle(colors)
+        self.colors = colors
+        self.__sprites = {}
+
+    def get_label_sprite(self, bbox_mess, class_ind, bbox_thick):
+        """
+        Returns the filled label of a box, rendered on a patch whose bottom row sits on the top edge of the box.
+        """
+        key = (bbox_mess, class_ind, bbox_thick)
+        sprite = self.__sprites.get(key)
+        if sprite is None:
+            if len(self.__sprites) >= self.max_sprites:
+                self.__sprites.clear()
+            t_size = cv2.getTextSize(bbox_mess, 0, self.font_scale, thickness=bbox_thick // 2)[0]
+            sprite = np.empty((t_size[1] + 4, t_size[0] + 1, 3), dtype=np.uint8)
+            sprite[...] = self.colors[class_ind]
+            cv2.putText(sprite, bbox_mess, (0, t_size[1] + 1), cv2.FONT_HERSHEY_SIMPLEX,
+                        self.font_scale, (0, 0, 0), bbox_thick // 2, lineType=cv2.LINE_AA)
+            self.__sprites[key] = sprite
+        return sprite
+
+    def draw(self, image, bboxes, show_label=True):
+        """
+        bboxes: [x_min, y_min, x_max, y_max, probability, cls_id] format coordinates.
+        """
+        if len(bboxes) == 0:
+            return image
+        image_h, image_w, _ = image.shape
         bbox_thick = int(0.6 * (image_h + image_w) / 600)
-        c1, c2 = (coor[0], coor[1]), (coor[2], coor[3])
-        cv2.rectangle(image, c1, c2, bbox_color, bbox_thick)
+        bboxes = np.array(bboxes)
+        coors = bboxes[:, :4].astype(np.int32)
+        class_inds = bboxes[:, 5].astype(np.int32)
+
+        # one closed polyline per box, one call per colour
+        polygons = coors[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        for class_ind in np.unique(class_inds):
+            cv2.polylines(image, list(polygons[class_inds == class_ind]), True, self.colors[class_ind], bbox_thick)
 
         if show_label:
-            bbox_mess = '%s: %.2f' % (classes[class_ind], score)
-            t_size = cv2.getTextSize(bbox_mess, 0, fontScale, thickness=bbox_thick // 2)[0]
-            cv2.rectangle(image, c1, (c1[0] + t_size[0], c1[1] - t_size[1] - 3), bbox_color, -1)  # filled
+            for coor, score, class_ind in zip(coors, bboxes[:, 4], class_inds):
+                bbox_mess = '%s: %.2f' % (self.classes[class_ind], score)
+                sprite = self.get_label_sprite(bbox_mess, class_ind, bbox_thick)
+                # clip the patch to the image, labels of boxes at the top edge are partly outside
+                x, y = coor[0], coor[1] - sprite.shape[0] + 1
+                x0, y0 = max(x, 0), max(y, 0)
+                x1, y1 = min(x + sprite.shape[1], image_w), min(y + sprite.shape[0], image_h)
+                if x0 < x1 and y0 < y1:
+                    image[y0:y1, x0:x1] = sprite[y0 - y:y1 - y, x0 - x:x1 - x]
+
+        return image
+
 
-            cv2.putText(image, bbox_mess, (c1[0], c1[1] - 2), cv2.FONT_HERSHEY_SIMPLEX,
-                        fontScale, (0, 0, 0), bbox_thick // 2, lineType=cv2.LINE_AA)
+_default_bbox_renderer = None
 
-    return image
+
+def draw_bbox(image, bboxes, classes=None, show_label=True):
+    """
+    bboxes: [x_min, y_min, x_max, y_max, probability, cls_id] format coordinates.
+    Keep a BboxRenderer around instead when drawing with custom classes on every frame.
+    """
+    global _default_bbox_renderer
+    if classes is not None:
+        return BboxRenderer(classes).draw(image, bboxes, show_label)
+    if _default_bbox_renderer is None:
+        _default_bbox_renderer = BboxRenderer(read_class_names(cfg.YOLO.CLASSES))
+    return _default_bbox_renderer.draw(image, bboxes, show_label)
 
 
 def bboxes_iou(boxes1, boxes2):
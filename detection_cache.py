@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def fingerprint(frame, hash_size=16):
+    """
+    Difference hash of the frame: the sign of the horizontal gradient of a (hash_size + 1) x hash_size grayscale
+    thumbnail, packed into bytes. Identical frames always match and sensor noise rarely flips a bit.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes()
+
+
+class DetectionCache:
+    """
+    Bounded LRU map from detection keys to detector results, with hit and miss counters. It targets static or
+    replayed input, where the same frame comes back exactly. A live scene can change while its coarse fingerprint
+    stays the same, so entries expire max_age seconds after the detection.
+    """
+
+    def __init__(self, capacity=64, max_age=2.0):
+        self.__capacity = capacity
+        self.__max_age = max_age
+        self.__entries = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__expired = 0
+
+    def get(self, key):
+        if key in self.__entries:
+            timestamp, bboxes = self.__entries[key]
+            if time.time() - timestamp <= self.__max_age:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return bboxes
+            del self.__entries[key]
+            self.__expired += 1
+        self.__misses += 1
+        return None
+
+    def put(self, key, bboxes):
+        self.__entries[key] = (time.time(), bboxes)
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__capacity:
+            self.__entries.popitem(last=False)
+
+    def clear(self):
+        self.__entries.clear()
+
+    def get_metrics(self):
+        lookups = self.__hits + self.__misses
+        return {"size": len(self.__entries),
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "expired": self.__expired,
+                "hit_rate": self.__hits / lookups if lookups else 0.}
+
+    def report(self):
+        return "size: %(size)d, hits: %(hits)d, misses: %(misses)d, expired: %(expired)d, " \
+               "hit rate: %(hit_rate).2f" % self.get_metrics()
+
+
+class CachedDetector:
+    """
+    Wraps a VisionEngine prediction method with a DetectionCache keyed by the frame fingerprint, the frame shape,
+    the detector name, the network input size and the class filter.
+    """
+
+    def __init__(self, detector, cache, input_size):
+        self.__detector = detector
+        self.__cache = cache
+        self.__name = detector.__name__
+        self.__input_size = input_size
+
+    def __call__(self, image, object_id=None, **kwargs):
+        key = (fingerprint(image), image.shape, self.__name, self.__input_size, object_id,
+               tuple(sorted(kwargs.items())))
+        bboxes = self.__cache.get(key)
+        if bboxes is None:
+            bboxes = self.__detector(image, object_id, **kwargs)
+            self.__cache.put(key, bboxes)
+        return bboxes
+
+    def report(self):
+        return self.__cache.report()
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class FeatureWindow:
+    """
+    Fixed-size circular buffer of gesture features. Every value is written twice, at its ring position and size
+    values later, so the latest size values are always one contiguous slice of the preallocated storage and window()
+    returns it without copying. push() reports when a window is due: once the buffer first fills up and then after
+    every stride new values.
+    """
+
+    def __init__(self, size=270, stride=90, dtype=np.float64):
+        self.__size = size
+        self.__stride = stride
+        self.__buffer = np.zeros(2 * size, dtype=dtype)
+        self.__write = 0
+        self.__total = 0
+        self.__next = size
+
+    def push(self, features):
+        """
+        Appends a 1-d array of features, returns True if a new window is ready.
+        """
+        n = len(features)
+        if n > self.__size:
+            features = features[n - self.__size:]
+            self.__total += n - self.__size
+            n = self.__size
+        first = min(n, self.__size - self.__write)
+        self.__buffer[self.__write:self.__write + first] = features[:first]
+        self.__buffer[self.__write + self.__size:self.__write + self.__size + first] = features[:first]
+        if first < n:
+            self.__buffer[:n - first] = features[first:]
+            self.__buffer[self.__size:self.__size + n - first] = features[first:]
+        self.__write = (self.__write + n) % self.__size
+        self.__total += n
+
+        if self.__total >= self.__next:
+            while self.__next <= self.__total:
+                self.__next += self.__stride
+            return True
+        return False
+
+    def window(self):
+        """
+        View of the latest size features, oldest first. Only valid until the next push.
+        """
+        return self.__buffer[self.__write:self.__write + self.__size]
+
+    def is_full(self):
+        return self.__total >= self.__size
+
+    def reset(self):
+        self.__write = 0
+        self.__total = 0
+        self.__next = self.__size
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class GestureSmoother:
+    """
+    Turns per-frame gesture probabilities into commands. The probabilities are smoothed with an exponential moving
+    average (alpha is the weight of the newest frame). A gesture starts when its smoothed probability is the highest
+    and reaches enter, and it has to fall below exit before any gesture can start again, so one held gesture gives
+    one command.
+    """
+
+    def __init__(self, alpha=0.3, enter=0.7, exit=0.4, ignored=(0, 4)):
+        self.__alpha = alpha
+        self.__enter = enter
+        self.__exit = exit
+        self.__ignored = ignored
+        self.__smoothed = None
+        self.__active = None
+
+    def update(self, probabilities):
+        """
+        Returns the gesture that started with this frame, or None.
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if self.__smoothed is None:
+            self.__smoothed = probabilities.copy()
+        else:
+            self.__smoothed += self.__alpha * (probabilities - self.__smoothed)
+
+        if self.__active is not None:
+            if self.__smoothed[self.__active] < self.__exit:
+                self.__active = None
+            return None
+        gesture = int(np.argmax(self.__smoothed))
+        if self.__smoothed[gesture] >= self.__enter:
+            self.__active = gesture
+            if gesture not in self.__ignored:
+                return gesture
+        return None
+
+    def get_probabilities(self):
+        return self.__smoothed
+
+    def reset(self):
+        self.__smoothed = None
+        self.__active = None
@@ -1,3 +1,4 @@
+import argparse
 import os
 import signal
 import time
@@ -6,53 +7,122 @@ from multiprocessing import Queue
 import numpy as np
 
 import Leap
+from gesture_buffer import FeatureWindow
+from gesture_stream import GestureSmoother
+from leap_calibration import LeapRayProjector, load_calibration, write_ray
+from leap_features import FEATURES_PER_FRAME, extract_features
+from leap_ingest import FrameListener
+
+# Leap frames between two model calls of a hand with GS, the debounced mode waits 10
+STREAM_STRIDE = 3
 
 
 class GestureEngine:
-    def __init__(self, queue: Queue):
+    def __init__(self, queue: Queue, ray=None):
         self.command_classes = ['Pointing', 'Capture', 'ZoomIn', 'ZoomOut', 'Roaming']
         self.queue = queue
-        self.prev_gesture = -1
+        # per Leap hand id: its feature window and last reported gesture
+        self.hands = {}
+        # shared array the index finger ray is published to, see leap_calibration
+        self.ray = ray
+        self.projector = None
+        self.listener = None
 
     def run(self, controller, model):
         from config import config
-        gesture_sequence = np.array([])
+        listener = FrameListener()
+        controller.add_listener(listener)
+        self.listener = listener
         while True:
-            frame = controller.frame()
-            for hand in frame.hands:
-                pv = []
-                av = []
-                prev_finger = None
-                c = hand.palm_position
-                m = 1
-                for finger in hand.fingers:
-                    if prev_finger:
-                        ad = finger.tip_position.distance_to(prev_finger.tip_position)
-                        av.append(ad)
-                        prev_finger = finger
-                    else:
-                        prev_finger = finger
-                    pd = finger.tip_position.distance_to(c)
-                    m = pd if finger.type == Leap.Finger.TYPE_MIDDLE else m
-                    pv.append(pd)
-                gesture_sequence = np.append(gesture_sequence, np.array(pv) / m)
-                gesture_sequence = np.append(gesture_sequence, np.array(av) / m)
-                if len(gesture_sequence) > 270:
-                    if config.GR == 1:
-                        prediction = model.predict(gesture_sequence[:270].reshape(1, 1, 270))
-                        gesture = np.argmax(prediction)
-                    else:
-                        prediction = model.predict([gesture_sequence[:270]])
-                        gesture = int(prediction[0])
-                    if self.prev_gesture != gesture and gesture not in [0, 4]:
-                        print("Gesture:", self.command_classes[gesture])
-                        # self.queue.put({"operation": self.command_classes[gesture]})
-                        self.prev_gesture = gesture
-                    gesture_sequence = gesture_sequence[90:]
-            time.sleep(0.01)
-
-    def start_prediction(self):
-        import tensorflow as tf
+            frame = listener.next_frame()
+            if frame is None:
+                # a replayed recording ends, the device never does
+                if getattr(controller, "is_finished", lambda: False)():
+                    return
+                continue
+            if self.projector is not None:
+                for hand in frame.hands:
+                    pointer = self.projector.project_hand(hand)
+                    if pointer is not None:
+                        write_ray(self.ray, pointer)
+            ids, features = extract_features(frame)
+            ready = self.update_hands(ids, features)
+            if not ready:
+                continue
+            windows = [self.hands[hand_id]["window"].window() for hand_id in ready]
+            if config.GS == 1:
+                probabilities = self.predict_probabilities(model, windows)
+                for hand_id, hand_probabilities in zip(ready, probabilities):
+                    gesture = self.hands[hand_id]["smoother"].update(hand_probabilities)
+                    if gesture is not None:
+                        self.publish(gesture)
+            else:
+                for hand_id, gesture in zip(ready, self.predict(model, windows)):
+                    self.debounce(hand_id, gesture)
+
+    def update_hands(self, ids, features):
+        """
+        Adds the features of every hand in the frame to its own window and forgets the hands that are gone.
+        Returns the ids of the hands with a new window.
+        """
+        for hand_id in list(self.hands):
+            if hand_id not in ids:
+                del self.hands[hand_id]
+        ready = []
+        for hand_id, hand_features in zip(ids.tolist(), features):
+            if hand_id not in self.hands:
+                self.hands[hand_id] = self.new_hand()
+            if self.hands[hand_id]["window"].push(hand_features):
+                ready.append(hand_id)
+        return ready
+
+    def new_hand(self):
+        from config import config
+        if config.GS == 1:
+            # a window every STREAM_STRIDE frames, smoothed into commands
+            return {"window": FeatureWindow(270, STREAM_STRIDE * FEATURES_PER_FRAME),
+                    "smoother": GestureSmoother()}
+        return {"window": FeatureWindow(270, 90), "prev_gesture": -1}
+
+    def predict(self, model, windows):
+        """
+        Classifies the windows of all ready hands with one model call.
+        """
+        from config import config
+        batch = np.stack(windows)
+        if config.GR == 1:
+            prediction = model.predict(batch.reshape(-1, 1, 270))
+            return np.argmax(prediction, axis=1).tolist()
+        return [int(gesture) for gesture in model.predict(batch)]
+
+    def predict_probabilities(self, model, windows):
+        """
+        Class probabilities of the windows of all ready hands, from one model call.
+        """
+        from config import config
+        batch = np.stack(windows)
+        if config.GR == 1:
+            return model.predict_on_batch(batch.reshape(-1, 1, 270))
+        # the SVM only gives labels
+        return np.eye(len(self.command_classes))[model.predict(batch).astype(np.int64)]
+
+    def debounce(self, hand_id, gesture):
+        hand = self.hands[hand_id]
+        if hand["prev_gesture"] != gesture and gesture not in [0, 4]:
+            self.publish(gesture)
+            hand["prev_gesture"] = gesture
+
+    def publish(self, gesture):
+        """
+        Sends a recognized gesture to the fusion engine, the same way in both modes.
+        """
+        print("Gesture:", self.command_classes[gesture])
+        self.queue.put({"operation": self.command_classes[gesture]})
+
+    def start_prediction(self, controller=None):
+        """
+        controller: Leap.Controller by default, or a leap_replay.ReplayController.
+        """
         import pickle
         import os
         import psutil
@@ -60,7 +130,12 @@ class GestureEngine:
         process = psutil.Process(os.getpid())
 
         start = process.memory_info()[0]
-        if config.GR == 1:
+        if config.GR == 1 and config.NM == 1:
+            # NumPy runtime of the exported model, TensorFlow is never imported
+            import numpy_models
+            model = numpy_models.load_model("./data/models/gesture_lstm_v9.npz")
+        elif config.GR == 1:
+            import tensorflow as tf
             # Initializing the model
             config = tf.ConfigProto(intra_op_parallelism_threads=4,
                                     inter_op_parallelism_threads=4,
@@ -74,18 +149,37 @@ class GestureEngine:
         usage = process.memory_info()[0] - start
         print("[Memory Usage | Gesture Recognition]", usage >> 20)
 
-        controller = Leap.Controller()
+        projection = load_calibration()
+        if self.ray is not None and projection is not None:
+            self.projector = LeapRayProjector(projection)
+
+        if controller is None:
+            controller = Leap.Controller()
         controller.set_policy_flags(Leap.Controller.POLICY_OPTIMIZE_HMD)
         try:
             self.run(controller, model)
         except KeyboardInterrupt:
+            if self.listener is not None:
+                print("[Leap Frames]", self.listener.report())
             print("GestureEngine:KeyboardInterrupt")
             os.kill(os.getpid(), signal.SIGKILL)
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replay", help="Leap recording to run on instead of the device, see leap_replay.py")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 0 for as fast as possible")
+    args = parser.parse_args()
+
+    controller = None
+    if args.replay:
+        from leap_replay import ReplayController
+        controller = ReplayController(args.replay, args.speed)
     ge = GestureEngine(queue=Queue())
-    ge.start_prediction()
+    start = time.time()
+    ge.start_prediction(controller)
+    if args.replay:
+        print("Replayed in %.2f s, %s" % (time.time() - start, ge.listener.report()))
 
 
 if __name__ == '__main__':
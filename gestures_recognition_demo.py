@@ -4,36 +4,37 @@ from multiprocessing import Queue
 
 import numpy as np
 
+from gesture_buffer import FeatureWindow
 from utils.logger import Logger
 
 
 class GestureEngine:
-    def __init__(self, queue: Queue):
+    def __init__(self, queue: Queue, ray=None):
+        # no Leap in the demo, so no pointing ray is published
         self.command_classes = ['Pointing', 'Capture', 'ZoomIn', 'ZoomOut', 'Roaming']
         self.queue = queue
         self.__logger = Logger("gesture")
 
     def run(self, model):
         from config import config
-        gesture_sequence = np.array([])
+        window = FeatureWindow(270, 90)
+        generator = np.random.default_rng()
+        feature = np.empty(9)
         while True:
-            feature = np.random.rand(1, 9)
-            gesture_sequence = np.append(gesture_sequence, feature)
-            if gesture_sequence.shape[0] > 270:
+            generator.random(out=feature)
+            if window.push(feature):
                 self.__logger.start()
                 if config.GR == 1:
-                    prediction = model.predict(gesture_sequence[:270].reshape(1, 1, 270))
+                    prediction = model.predict(window.window().reshape(1, 1, 270))
                     gesture = np.argmax(prediction)
                 else:
-                    prediction = model.predict([gesture_sequence[:270]])
+                    prediction = model.predict([window.window()])
                     gesture = int(prediction[0])
                 # print("Gesture:", self.command_classes[gesture])
                 self.__logger.checkpoint("%s" % self.command_classes[gesture])
-                gesture_sequence = gesture_sequence[90:]
             time.sleep(0.006)
 
     def start_prediction(self):
-        import tensorflow as tf
         import pickle
         import os
         import psutil
@@ -41,7 +42,12 @@ class GestureEngine:
         process = psutil.Process(os.getpid())
 
         start = process.memory_info()[0]
-        if config.GR == 1:
+        if config.GR == 1 and config.NM == 1:
+            # NumPy runtime of the exported model, TensorFlow is never imported
+            import numpy_models
+            model = numpy_models.load_model("./data/models/gesture_lstm_v9.npz")
+        elif config.GR == 1:
+            import tensorflow as tf
             # Initializing the model
             config = tf.ConfigProto(intra_op_parallelism_threads=4,
                                     inter_op_parallelism_threads=4,
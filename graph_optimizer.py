@@ -0,0 +1,113 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import tensorflow as tf
+from tensorflow.tools.graph_transforms import TransformGraph
+
+import core.utils as utils
+from object_detection_demo import YOLO_TENSOR_NAMES, FRCNN_TENSOR_NAMES, optimized_graph_path
+
+# name: (frozen graph, tensor names used by VisionEngine, input dtype)
+GRAPHS = {
+    "yolo": (os.path.join('data', 'models', 'yolo_v3.pb'), YOLO_TENSOR_NAMES, "float"),
+    "ssd": (os.path.join('data', 'models', 'ssd_inception_v7.pb'), FRCNN_TENSOR_NAMES, "uint8"),
+}
+
+INPUT_SIZE = 608
+
+
+def get_transforms(input_type):
+    return ["strip_unused_nodes(type=%s)" % input_type,
+            "remove_nodes(op=Identity, op=CheckNumerics)",
+            "fold_constants(ignore_errors=true)",
+            "fold_batch_norms",
+            "fold_old_batch_norms",
+            "fuse_resize_pad_and_conv",
+            "fuse_pad_and_conv",
+            "fuse_resize_and_conv",
+            "merge_duplicate_nodes",
+            "strip_unused_nodes(type=%s)" % input_type,
+            "sort_by_execution_order"]
+
+
+def read_graph_def(path):
+    with tf.gfile.GFile(path, 'rb') as fid:
+        graph_def = tf.GraphDef()
+        graph_def.ParseFromString(fid.read())
+    return graph_def
+
+
+def optimize_graph(graph_def, tensor_names, input_type):
+    """
+    Runs the graph transforms, keeping only what is needed to go from the input tensor to the output tensors
+    listed in tensor_names (the first one is the input).
+    """
+    node_names = [n.split(":")[0] for n in tensor_names]
+    return TransformGraph(graph_def, node_names[:1], node_names[1:], get_transforms(input_type))
+
+
+def get_feed(name, image):
+    if name == "yolo":
+        return np.expand_dims(utils.image_preporcess(np.copy(image), [INPUT_SIZE, INPUT_SIZE]), axis=0)
+    return np.expand_dims(image, axis=0)
+
+
+def profile_graph(path, name, tensor_names, image, runs):
+    """
+    Loads the graph from disk the same way VisionEngine does and returns (nodes, size, load time, latency).
+    """
+    start = time.time()
+    graph_def = read_graph_def(path)
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+    load_time = time.time() - start
+
+    tensors = [graph.get_tensor_by_name(n) for n in tensor_names]
+    feed = get_feed(name, image)
+    with tf.Session(graph=graph) as sess:
+        # the first run includes the allocation and autotuning cost, keep it out of the latency
+        sess.run(tensors[1:], feed_dict={tensors[0]: feed})
+        times = []
+        for _ in range(runs):
+            start = time.time()
+            sess.run(tensors[1:], feed_dict={tensors[0]: feed})
+            times.append(time.time() - start)
+    return len(graph_def.node), os.path.getsize(path), load_time, np.mean(times)
+
+
+def print_report(name, before, after):
+    print("[Graph Optimizer | %s]" % name)
+    print("%-20s %15s %15s" % ("", "frozen", "optimized"))
+    print("%-20s %15d %15d" % ("nodes", before[0], after[0]))
+    print("%-20s %15.2f %15.2f" % ("file size (MB)", before[1] / 2 ** 20, after[1] / 2 ** 20))
+    print("%-20s %15.2f %15.2f" % ("load time (s)", before[2], after[2]))
+    print("%-20s %15.2f %15.2f" % ("latency (ms)", before[3] * 1000, after[3] * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimizes the frozen detector graphs for inference")
+    parser.add_argument("--graphs", nargs="+", default=list(GRAPHS.keys()), choices=list(GRAPHS.keys()))
+    parser.add_argument("--image", default="images/10.jpg")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    for name in args.graphs:
+        path, tensor_names, input_type = GRAPHS[name]
+        output_path = optimized_graph_path(path)
+
+        optimized_graph_def = optimize_graph(read_graph_def(path), tensor_names, input_type)
+        with tf.gfile.GFile(output_path, 'wb') as fid:
+            fid.write(optimized_graph_def.SerializeToString())
+
+        before = profile_graph(path, name, tensor_names, image, args.runs)
+        after = profile_graph(output_path, name, tensor_names, image, args.runs)
+        print_report(name, before, after)
+
+
+if __name__ == '__main__':
+    main()
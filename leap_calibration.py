@@ -0,0 +1,201 @@
+"""
+Maps the Leap index finger ray into camera pixels.
+
+Calibrate once with the camera and the Leap in their final positions:
+    LD_PRELOAD=./libLeap.so python leap_calibration.py
+Hold the index fingertip still, click it in the camera window to record a correspondence, and repeat for at least
+six spread out positions at different depths. Press 'c' to solve and save the projection, 'u' to undo, 'q' to quit.
+"""
+import os
+import time
+
+import numpy as np
+
+CALIBRATION_PATH = os.path.join("data", "models", "leap_camera.npy")
+
+# layout of the shared ray array: timestamp, tip x, tip y, unit direction x, unit direction y
+RAY_SIZE = 5
+# seconds after which a published ray is considered stale
+RAY_MAX_AGE = 0.2
+
+
+def calibrate(leap_points, pixel_points):
+    """
+    Direct linear transform: solves the 3x4 projection matrix P with pixel ~ P [x, y, z, 1] from at least six
+    Leap positions (millimetres) and the pixels they were seen at. The points are normalized first for stability.
+    """
+    leap_points = np.asarray(leap_points, dtype=np.float64)
+    pixel_points = np.asarray(pixel_points, dtype=np.float64)
+    if len(leap_points) < 6 or len(leap_points) != len(pixel_points):
+        raise ValueError("At least six matching Leap and pixel points are needed, got %d and %d"
+                         % (len(leap_points), len(pixel_points)))
+
+    def normalization(points):
+        center = points.mean(axis=0)
+        scale = np.sqrt(points.shape[1]) / np.mean(np.linalg.norm(points - center, axis=1))
+        transform = np.diag(np.append(np.full(points.shape[1], scale), 1.))
+        transform[:-1, -1] = -scale * center
+        return transform
+
+    leap_transform = normalization(leap_points)
+    pixel_transform = normalization(pixel_points)
+    leap_h = np.hstack([leap_points, np.ones((len(leap_points), 1))]).dot(leap_transform.T)
+    pixel_h = np.hstack([pixel_points, np.ones((len(pixel_points), 1))]).dot(pixel_transform.T)
+
+    rows = []
+    for (u, v, _), point in zip(pixel_h, leap_h):
+        rows.append(np.concatenate([point, np.zeros(4), -u * point]))
+        rows.append(np.concatenate([np.zeros(4), point, -v * point]))
+    _, _, vt = np.linalg.svd(np.array(rows))
+    projection = vt[-1].reshape(3, 4)
+    projection = np.linalg.inv(pixel_transform).dot(projection).dot(leap_transform)
+    return projection / projection[-1, -1]
+
+
+def project(projection, points):
+    """
+    Projects (N, 3) Leap points to (N, 2) pixels.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    projected = np.hstack([points, np.ones((len(points), 1))]).dot(projection.T)
+    return projected[:, :2] / projected[:, 2:]
+
+
+def reprojection_error(projection, leap_points, pixel_points):
+    """
+    Mean pixel distance between the projected Leap points and the clicked pixels.
+    """
+    return float(np.mean(np.linalg.norm(project(projection, leap_points) - np.asarray(pixel_points), axis=1)))
+
+
+def save_calibration(projection, path=CALIBRATION_PATH):
+    np.save(path, projection)
+
+
+def load_calibration(path=CALIBRATION_PATH):
+    """
+    Returns the saved projection matrix, or None if the Leap was never calibrated.
+    """
+    if not os.path.exists(path):
+        return None
+    return np.load(path)
+
+
+class LeapRayProjector:
+    """
+    Projects the index finger ray of a Leap hand into the camera image, as a pointer of the form PointingResolver
+    takes: fingertip pixel and unit pointing direction in pixels.
+    """
+
+    def __init__(self, projection, reach=200.):
+        self.__projection = projection
+        # millimetres along the finger used to find the direction of the ray in the image
+        self.__reach = reach
+
+    def project_finger(self, tip, direction):
+        tip = np.asarray(tip, dtype=np.float64)
+        ends = project(self.__projection, [tip, tip + self.__reach * np.asarray(direction, dtype=np.float64)])
+        image_direction = ends[1] - ends[0]
+        norm = np.linalg.norm(image_direction)
+        if norm < 1e-6:
+            # pointing straight into the camera, the fingertip alone is all there is
+            return np.concatenate([ends[0], [0., 0.]])
+        return np.concatenate([ends[0], image_direction / norm])
+
+    def project_hand(self, hand):
+        """
+        Returns the pointer of the index finger of a Leap.Hand, or None if the finger is not tracked.
+        """
+        import Leap
+        for finger in hand.fingers:
+            if finger.type == Leap.Finger.TYPE_INDEX and finger.is_valid:
+                tip, direction = finger.stabilized_tip_position, finger.direction
+                return self.project_finger([tip.x, tip.y, tip.z], [direction.x, direction.y, direction.z])
+        return None
+
+
+def write_ray(shared_ray, pointer):
+    """
+    Publishes a pointer to a multiprocessing.Array('d', RAY_SIZE) shared with the FusionEngine.
+    """
+    with shared_ray.get_lock():
+        shared_ray[0] = time.time()
+        shared_ray[1:RAY_SIZE] = [float(value) for value in pointer]
+
+
+def read_ray(shared_ray, max_age=RAY_MAX_AGE):
+    """
+    Returns the last published pointer as a (1, 4) array, or None if there is none or it is older than max_age.
+    """
+    if shared_ray is None:
+        return None
+    with shared_ray.get_lock():
+        values = shared_ray[:RAY_SIZE]
+    if time.time() - values[0] > max_age:
+        return None
+    return np.array([values[1:]])
+
+
+def main():
+    import cv2
+    import Leap
+
+    controller = Leap.Controller()
+    capture = cv2.VideoCapture(0)
+    leap_points, pixel_points = [], []
+    clicks = []
+
+    cv2.namedWindow("calibration")
+    cv2.setMouseCallback("calibration", lambda event, x, y, flags, param:
+                         clicks.append((x, y)) if event == cv2.EVENT_LBUTTONDOWN else None)
+    projector = None
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            continue
+        tip = None
+        for hand in controller.frame().hands:
+            for finger in hand.fingers:
+                if finger.type == Leap.Finger.TYPE_INDEX and finger.is_valid:
+                    position = finger.stabilized_tip_position
+                    tip = [position.x, position.y, position.z]
+                    if projector is not None:
+                        pointer = projector.project_hand(hand)
+                        if pointer is not None:
+                            start = tuple(int(p) for p in pointer[:2])
+                            end = tuple(int(p) for p in pointer[:2] + 300 * pointer[2:])
+                            cv2.line(frame, start, end, (60, 76, 231), 2)
+        while clicks:
+            pixel = clicks.pop(0)
+            if tip is None:
+                print("No index finger in view, point again")
+                continue
+            leap_points.append(tip)
+            pixel_points.append(pixel)
+            print("Point %d: leap %s pixel %s" % (len(leap_points), np.round(tip, 1), pixel))
+        for pixel in pixel_points:
+            cv2.circle(frame, pixel, 4, (185, 128, 41), -1)
+        cv2.imshow("calibration", frame)
+
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q'):
+            break
+        elif key == ord('u') and leap_points:
+            leap_points.pop()
+            pixel_points.pop()
+        elif key == ord('c'):
+            try:
+                projection = calibrate(leap_points, pixel_points)
+            except ValueError as e:
+                print(e)
+                continue
+            save_calibration(projection)
+            projector = LeapRayProjector(projection)
+            print("Saved %s, reprojection error %.1f px over %d points"
+                  % (CALIBRATION_PATH, reprojection_error(projection, leap_points, pixel_points), len(leap_points)))
+    capture.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import numpy as np
+
+FINGERS = 5
+# Leap lists the fingers of a hand from thumb to pinky
+MIDDLE = 2
+# palm distances of every finger and distances between adjacent fingers
+FEATURES_PER_FRAME = 2 * FINGERS - 1
+
+
+def read_frame(frame):
+    """
+    Copies the fingertip and palm positions of every hand of a Leap frame into arrays, touching the SWIG objects only
+    for the positions themselves. Returns (hand ids, (hands, 5, 3) fingertips, (hands, 3) palms). Hands that do not
+    report five fingers are skipped.
+    """
+    hands = frame.hands
+    ids, tips, palms = [], [], []
+    for hand in hands:
+        fingers = hand.fingers
+        if len(fingers) != FINGERS:
+            continue
+        palm = hand.palm_position
+        palms.append((palm.x, palm.y, palm.z))
+        for finger in fingers:
+            tip = finger.tip_position
+            tips.append((tip.x, tip.y, tip.z))
+        ids.append(hand.id)
+    return (np.array(ids, dtype=np.int64),
+            np.array(tips, dtype=np.float64).reshape(-1, FINGERS, 3),
+            np.array(palms, dtype=np.float64).reshape(-1, 3))
+
+
+def gesture_features(tips, palms):
+    """
+    The 9 gesture features of every hand: the 5 fingertip to palm distances followed by the 4 distances between
+    adjacent fingertips, all divided by the middle fingertip to palm distance.
+    """
+    palm_distances = np.linalg.norm(tips - palms[:, np.newaxis, :], axis=2)
+    tip_distances = np.linalg.norm(tips[:, 1:] - tips[:, :-1], axis=2)
+    features = np.concatenate([palm_distances, tip_distances], axis=1)
+    return features / palm_distances[:, MIDDLE:MIDDLE + 1]
+
+
+def extract_features(frame):
+    """
+    Returns (hand ids, (hands, 9) gesture features) of a Leap frame.
+    """
+    ids, tips, palms = read_frame(frame)
+    return ids, gesture_features(tips, palms)
@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+
+import Leap
+
+# frames the Leap service keeps in its history
+HISTORY_SIZE = 60
+
+
+class FrameListener(Leap.Listener):
+    """
+    Receives Leap frames through on_frame callbacks instead of polling controller.frame(). Frames are deduplicated by
+    frame id, frames that arrived between two callbacks are back-filled from the controller history, and everything
+    goes in order into a bounded deque, which the gesture engine drains with next_frame(). When the consumer falls
+    behind, the oldest queued frames are evicted and counted as overflow.
+    """
+
+    def __init__(self, max_frames=256):
+        Leap.Listener.__init__(self)
+        self.__frames = deque(maxlen=max_frames)
+        self.__available = threading.Event()
+        self.__last_id = None
+        self.__received = 0
+        self.__backfilled = 0
+        self.__duplicates = 0
+        self.__lost = 0
+        self.__overflow = 0
+
+    def on_frame(self, controller):
+        frame = controller.frame()
+        frame_id = frame.id
+        if self.__last_id is not None and frame_id <= self.__last_id:
+            self.__duplicates += 1
+            return
+        if self.__last_id is not None and frame_id > self.__last_id + 1:
+            self.__backfill(controller, frame_id)
+        self.__enqueue(frame)
+        self.__last_id = frame_id
+        self.__received += 1
+        self.__available.set()
+
+    def __backfill(self, controller, frame_id):
+        missing = frame_id - self.__last_id - 1
+        history = min(missing, HISTORY_SIZE - 1)
+        self.__lost += missing - history
+        # controller.frame(1) is the frame before the current one, oldest first
+        for back in range(history, 0, -1):
+            frame = controller.frame(back)
+            if frame.is_valid and self.__last_id < frame.id < frame_id:
+                self.__enqueue(frame)
+                self.__last_id = frame.id
+                self.__backfilled += 1
+            else:
+                self.__lost += 1
+
+    def __enqueue(self, frame):
+        if len(self.__frames) == self.__frames.maxlen:
+            # the append evicts the oldest frame
+            self.__overflow += 1
+        self.__frames.append(frame)
+
+    def next_frame(self, timeout=0.1):
+        """
+        Returns the oldest queued frame, waiting up to timeout for one, or None.
+        """
+        while True:
+            try:
+                return self.__frames.popleft()
+            except IndexError:
+                self.__available.clear()
+                # a frame appended between the failed pop and clear() would otherwise wait for the next callback
+                if self.__frames:
+                    continue
+                if not self.__available.wait(timeout):
+                    return None
+
+    def pending(self):
+        return len(self.__frames)
+
+    def get_metrics(self):
+        return {"received": self.__received,
+                "backfilled": self.__backfilled,
+                "duplicates": self.__duplicates,
+                "lost": self.__lost,
+                "overflow": self.__overflow,
+                "queued": len(self.__frames)}
+
+    def report(self):
+        return "received: %(received)d, backfilled: %(backfilled)d, duplicates: %(duplicates)d, lost: %(lost)d, " \
+               "overflow: %(overflow)d, queued: %(queued)d" % self.get_metrics()
@@ -0,0 +1,156 @@
+"""
+Records Leap frames to a file and plays them back through a controller with the Leap.Controller interface the
+gesture engine uses, so the gesture pipeline can run without the device.
+
+    LD_PRELOAD=./libLeap.so python leap_replay.py record data/leap/session.leap --seconds 30
+    LD_PRELOAD=./libLeap.so python gestures_recognition.py --replay data/leap/session.leap --speed 0
+
+File format: MAGIC, then for every frame a RECORD header (device capture time in seconds, blob length) followed by
+the Frame.serialize() blob. Replay follows the differences between the capture times.
+"""
+import argparse
+import ctypes
+import struct
+import threading
+import time
+from collections import deque
+
+import Leap
+from leap_ingest import HISTORY_SIZE, FrameListener
+
+MAGIC = b"LEAPREC1"
+RECORD = struct.Struct("<dI")
+# frames a listener may have queued before an unthrottled replay waits for it
+REPLAY_BACKLOG = 32
+
+
+def serialize_frame(frame):
+    data, length = frame.serialize
+    return bytes((ctypes.c_ubyte * length).from_address(int(data.cast())))
+
+
+def deserialize_frame(blob):
+    """
+    Needs a Leap.Controller to exist in the process, the device does not have to be connected.
+    """
+    data = Leap.byte_array(len(blob))
+    ctypes.memmove(int(data.cast()), blob, len(blob))
+    frame = Leap.Frame()
+    frame.deserialize((data, len(blob)))
+    return frame
+
+
+def write_frames(path, frames):
+    """
+    Writes (capture time in seconds, Leap.Frame) pairs.
+    """
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        for timestamp, frame in frames:
+            blob = serialize_frame(frame)
+            f.write(RECORD.pack(timestamp, len(blob)))
+            f.write(blob)
+
+
+def read_frames(path):
+    """
+    Returns the (timestamp, blob) records of a recording.
+    """
+    records = []
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a Leap recording" % path)
+        header = f.read(RECORD.size)
+        while len(header) == RECORD.size:
+            timestamp, length = RECORD.unpack(header)
+            records.append((timestamp, f.read(length)))
+            header = f.read(RECORD.size)
+    return records
+
+
+def record(path, seconds):
+    controller = Leap.Controller()
+    listener = FrameListener(max_frames=1000000)
+    controller.add_listener(listener)
+    print("Recording for %d seconds..." % seconds)
+    frames = []
+    end = time.time() + seconds
+    while time.time() < end:
+        frame = listener.next_frame()
+        if frame is not None:
+            # Frame.timestamp is the device capture time in microseconds, back-filled frames are dequeued in bursts
+            frames.append((frame.timestamp * 1e-6, frame))
+    controller.remove_listener(listener)
+    write_frames(path, frames)
+    print("Recorded %d frames to %s (%s)" % (len(frames), path, listener.report()))
+
+
+class ReplayController:
+    """
+    Plays a recording back to Leap listeners. speed scales the recorded timing: 1 replays in real time, 2 twice as
+    fast, 0 as fast as the listeners take the frames. frame(history) serves the last HISTORY_SIZE replayed frames like
+    the real controller.
+    """
+
+    def __init__(self, path, speed=1.0):
+        # deserializing needs a controller instance, it does not need the device
+        self.__controller = Leap.Controller()
+        self.__frames = [(timestamp, deserialize_frame(blob)) for timestamp, blob in read_frames(path)]
+        self.__speed = speed
+        self.__history = deque(maxlen=HISTORY_SIZE)
+        self.__listeners = []
+        self.__thread = None
+        self.__finished = threading.Event()
+
+    def add_listener(self, listener):
+        self.__listeners.append(listener)
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.__replay, daemon=True)
+            self.__thread.start()
+        return True
+
+    def remove_listener(self, listener):
+        if listener in self.__listeners:
+            self.__listeners.remove(listener)
+        return True
+
+    def set_policy_flags(self, flags):
+        pass
+
+    @property
+    def is_connected(self):
+        return True
+
+    def frame(self, history=0):
+        if history >= len(self.__history):
+            return Leap.Frame.invalid
+        return self.__history[-1 - history]
+
+    def is_finished(self):
+        return self.__finished.is_set()
+
+    def __replay(self):
+        start = time.time()
+        first = self.__frames[0][0] if self.__frames else 0.
+        for timestamp, frame in self.__frames:
+            if self.__speed > 0:
+                delay = (timestamp - first) / self.__speed - (time.time() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.__history.append(frame)
+            for listener in list(self.__listeners):
+                if self.__speed <= 0:
+                    # unthrottled, let the consumer catch up rather than overflow the listener queue
+                    while listener.pending() >= REPLAY_BACKLOG:
+                        time.sleep(0.001)
+                listener.on_frame(self)
+        self.__finished.set()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["record"])
+    parser.add_argument("path")
+    parser.add_argument("--seconds", type=int, default=30)
+    args = parser.parse_args()
+    record(args.path, args.seconds)
@@ -0,0 +1,160 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+BOUNDARY = "frame"
+
+INDEX_PAGE = """<html>
+<head><title>Object detector</title></head>
+<body>
+<img src="/stream"/>
+<p>%s</p>
+<script>
+function send(key) { fetch("/command/" + key, {method: "POST"}); }
+</script>
+</body>
+</html>
+"""
+
+
+class MJPEGServer:
+    """
+    Serves annotated frames as MJPEG over HTTP instead of showing them with cv2.imshow.
+    publish() only swaps in the latest frame. An encoder thread compresses at most fps frames per second and every
+    viewer is sent the newest JPEG when it is ready for one, so a slow viewer skips frames instead of holding back the
+    encoder or the other viewers. Commands are received as POST /command/<key> and handed to on_command(key).
+    They are not authenticated, so the server only listens on the local machine unless another host is given.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, fps=15, quality=80, on_command=None, commands=()):
+        self.__interval = 1. / fps
+        self.__quality = quality
+        self.__on_command = on_command
+        self.__commands = list(commands)
+        self.__frame = None
+        self.__frame_ready = threading.Event()
+        self.__jpeg = None
+        self.__sequence = 0
+        self.__condition = threading.Condition()
+        self.__running = False
+        self.__server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.__server.daemon_threads = True
+
+    def start(self):
+        self.__running = True
+        threading.Thread(target=self.__encode, daemon=True).start()
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.__running = False
+        self.__frame_ready.set()
+        self.__server.shutdown()
+        self.__server.server_close()
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def publish(self, frame):
+        self.__frame = frame
+        self.__frame_ready.set()
+
+    def get_jpeg(self, sequence=0, timeout=1.0):
+        """
+        Returns (sequence, jpeg bytes) of the first encoded frame newer than sequence, or (sequence, None) on timeout.
+        """
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__sequence > sequence or not self.__running, timeout)
+            if self.__sequence > sequence:
+                return self.__sequence, self.__jpeg
+        return sequence, None
+
+    def is_running(self):
+        return self.__running
+
+    def __encode(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.__quality]
+        while self.__running:
+            self.__frame_ready.wait()
+            self.__frame_ready.clear()
+            frame = self.__frame
+            if frame is None:
+                continue
+            start = time.time()
+            ok, jpeg = cv2.imencode(".jpg", frame, params)
+            if ok:
+                with self.__condition:
+                    self.__jpeg = jpeg.tobytes()
+                    self.__sequence += 1
+                    self.__condition.notify_all()
+            # frames published while sleeping are dropped, only the latest one gets encoded
+            time.sleep(max(0., self.__interval - (time.time() - start)))
+
+    def get_commands(self):
+        return self.__commands
+
+    def command(self, key):
+        """
+        Runs a viewer command, returns False if the key is not a known command.
+        """
+        if key not in self.__commands or self.__on_command is None:
+            return False
+        self.__on_command(key)
+        return True
+
+    def __make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/":
+                    buttons = " ".join('<button onclick="send(\'%s\')">%s</button>' % (key, key)
+                                       for key in server.get_commands())
+                    self.send_body(200, "text/html", (INDEX_PAGE % buttons).encode())
+                elif self.path == "/snapshot.jpg":
+                    _, jpeg = server.get_jpeg()
+                    if jpeg is None:
+                        self.send_body(503, "text/plain", b"No frame yet\n")
+                    else:
+                        self.send_body(200, "image/jpeg", jpeg)
+                elif self.path == "/stream":
+                    self.stream()
+                else:
+                    self.send_body(404, "text/plain", b"Not found\n")
+
+            def do_POST(self):
+                prefix = "/command/"
+                if self.path.startswith(prefix) and server.command(self.path[len(prefix):]):
+                    self.send_body(204, "text/plain", b"")
+                else:
+                    self.send_body(404, "text/plain", b"Unknown command\n")
+
+            def send_body(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def stream(self):
+                self.send_response(200)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=%s" % BOUNDARY)
+                self.end_headers()
+                sequence = 0
+                try:
+                    while server.is_running():
+                        sequence, jpeg = server.get_jpeg(sequence)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(b"--%s\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+                                         % (BOUNDARY.encode(), len(jpeg)))
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,74 @@
+"""
+Exports the gesture and intent Keras models to .npz files for numpy_models and checks that both give the same
+outputs on random inputs.
+
+    python model_export.py data/models/gesture_lstm_v9.h5 data/models/text_classification_lstm.h5
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+import numpy_models
+
+# layer config fields the NumPy layers read
+CONFIG_FIELDS = ["units", "activation", "recurrent_activation", "return_sequences"]
+
+
+def export(model, path):
+    configs, arrays = [], {}
+    for index, layer in enumerate(model.layers):
+        class_name = type(layer).__name__
+        if class_name not in numpy_models.LAYERS:
+            raise ValueError("Layer %s (%s) has no NumPy implementation" % (layer.name, class_name))
+        config = layer.get_config()
+        if config.get("go_backwards"):
+            raise ValueError("Layer %s runs backwards, the NumPy LSTM does not support it" % layer.name)
+        entry = {"class_name": class_name}
+        entry.update({field: config[field] for field in CONFIG_FIELDS if field in config})
+        configs.append(entry)
+        for weight, value in zip(layer.weights, layer.get_weights()):
+            # e.g. lstm/recurrent_kernel:0
+            arrays["%d/%s" % (index, weight.name.split("/")[-1].split(":")[0])] = value
+    np.savez(path, layers=np.array(json.dumps(configs)), **arrays)
+
+
+def random_inputs(model, samples, rng):
+    shape = (samples,) + tuple(model.input_shape[1:])
+    first = model.layers[0]
+    if type(first).__name__ == "Embedding":
+        return rng.randint(0, first.input_dim, shape)
+    return rng.uniform(0., 2., shape).astype(np.float32)
+
+
+def check_parity(model, numpy_model, samples=16, seed=0):
+    """
+    Returns the largest absolute difference between the Keras and NumPy outputs on random inputs.
+    """
+    inputs = random_inputs(model, samples, np.random.RandomState(seed))
+    return float(np.max(np.abs(model.predict(inputs) - numpy_model.predict(inputs))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("models", nargs="+", help="Keras .h5 models")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    failed = False
+    for path in args.models:
+        model = tf.keras.models.load_model(path)
+        output = os.path.splitext(path)[0] + ".npz"
+        export(model, output)
+        difference = check_parity(model, numpy_models.load_model(output))
+        ok = difference <= args.tolerance
+        failed = failed or not ok
+        print("%s -> %s, max difference %.2e %s" % (path, output, difference, "ok" if ok else "FAILED"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
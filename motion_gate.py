@@ -0,0 +1,109 @@
+import time
+
+import cv2
+
+
+class MotionGate:
+    """
+    Cheap scene change detector. Frames are downsampled to grayscale thumbnails and compared with the thumbnail of
+    the last frame that went through the detector. A still scene becomes moving once the mean absolute difference
+    crosses threshold, and a moving scene becomes still only after settle consecutive frames below release.
+    """
+
+    def __init__(self, size=(80, 60), threshold=6.0, release=3.0, settle=3):
+        self.__size = size
+        self.__threshold = threshold
+        self.__release = release
+        self.__settle = settle
+        self.__reference = None
+        self.__moving = True
+        self.__still_frames = 0
+
+    def thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.__size, interpolation=cv2.INTER_AREA)
+
+    def update(self, frame):
+        """
+        Returns True if the scene moved since the last detection, in which case the frame becomes the new reference.
+        """
+        small = self.thumbnail(frame)
+        if self.__reference is None:
+            self.__reference = small
+            return True
+
+        difference = cv2.mean(cv2.absdiff(small, self.__reference))[0]
+        if self.__moving:
+            self.__still_frames = self.__still_frames + 1 if difference < self.__release else 0
+            if self.__still_frames >= self.__settle:
+                self.__moving = False
+        elif difference > self.__threshold:
+            self.__moving = True
+            self.__still_frames = 0
+
+        if self.__moving:
+            self.__reference = small
+        return self.__moving
+
+    def is_moving(self):
+        return self.__moving
+
+    def invalidate(self):
+        self.__reference = None
+        self.__moving = True
+        self.__still_frames = 0
+
+
+class GatedDetector:
+    """
+    Wraps a VisionEngine prediction method and reuses its last detections while the motion gate reports a still
+    scene. Detections are kept per (object_id, keyword arguments) so a filtered and an all-class search never share
+    results.
+    """
+
+    def __init__(self, detector, gate):
+        self.__detector = detector
+        self.__gate = gate
+        self.__detections = {}
+        self.__calls = 0
+        self.__skipped = 0
+        self.__inference_time = 0.
+        self.__gate_time = 0.
+
+    def __call__(self, image, object_id=None, **kwargs):
+        self.__calls += 1
+        start = time.time()
+        moving = self.__gate.update(image)
+        self.__gate_time += time.time() - start
+
+        key = (object_id, tuple(sorted(kwargs.items())))
+        if moving:
+            self.__detections.clear()
+        elif key in self.__detections:
+            self.__skipped += 1
+            return self.__detections[key]
+
+        start = time.time()
+        bboxes = self.__detector(image, object_id, **kwargs)
+        self.__inference_time += time.time() - start
+        self.__detections[key] = bboxes
+        return bboxes
+
+    def invalidate(self):
+        self.__gate.invalidate()
+        self.__detections.clear()
+
+    def get_metrics(self):
+        inferences = self.__calls - self.__skipped
+        mean_inference = self.__inference_time / inferences if inferences else 0.
+        return {"calls": self.__calls,
+                "inferences": inferences,
+                "skipped": self.__skipped,
+                "mean_inference_ms": mean_inference * 1000,
+                "gate_ms": self.__gate_time * 1000,
+                "saved_ms": (self.__skipped * mean_inference - self.__gate_time) * 1000}
+
+    def report(self):
+        return "calls: %(calls)d, inferences: %(inferences)d, skipped: %(skipped)d, " \
+               "mean inference: %(mean_inference_ms).1f ms, gate cost: %(gate_ms).1f ms, " \
+               "saved: %(saved_ms).1f ms" % self.get_metrics()
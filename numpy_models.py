@@ -0,0 +1,142 @@
+"""
+NumPy inference for the small Keras models of the gesture and speech processes, so they can run without importing
+TensorFlow. The weights are exported once with model_export.py to an .npz file holding a JSON list of layer configs
+("layers") and the weights of layer i as "<i>/<name>".
+"""
+import json
+
+import numpy as np
+
+
+def hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0., 1.)
+
+
+def sigmoid(x):
+    return 1. / (1. + np.exp(-x))
+
+
+def softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.),
+    "tanh": np.tanh,
+    "sigmoid": sigmoid,
+    "hard_sigmoid": hard_sigmoid,
+    "softmax": softmax,
+}
+
+
+class Embedding:
+    def __init__(self, config, weights):
+        self.__embeddings = weights["embeddings"]
+
+    def __call__(self, x):
+        return self.__embeddings[x.astype(np.int64)]
+
+
+class LSTM:
+    """
+    Keras LSTM, gates in the Keras order input, forget, cell, output.
+    """
+
+    def __init__(self, config, weights):
+        self.__units = config["units"]
+        self.__return_sequences = config.get("return_sequences", False)
+        self.__activation = ACTIVATIONS[config.get("activation", "tanh")]
+        self.__recurrent_activation = ACTIVATIONS[config.get("recurrent_activation", "hard_sigmoid")]
+        self.__kernel = weights["kernel"]
+        self.__recurrent_kernel = weights["recurrent_kernel"]
+        self.__bias = weights["bias"] if "bias" in weights else np.zeros(4 * self.__units, dtype=self.__kernel.dtype)
+
+    def __call__(self, x):
+        batch, steps, _ = x.shape
+        units = self.__units
+        # the input projection of every step in one product
+        projected = x.dot(self.__kernel) + self.__bias
+        h = np.zeros((batch, units), dtype=projected.dtype)
+        c = np.zeros((batch, units), dtype=projected.dtype)
+        outputs = []
+        for t in range(steps):
+            z = projected[:, t] + h.dot(self.__recurrent_kernel)
+            i = self.__recurrent_activation(z[:, :units])
+            f = self.__recurrent_activation(z[:, units:2 * units])
+            c = f * c + i * self.__activation(z[:, 2 * units:3 * units])
+            o = self.__recurrent_activation(z[:, 3 * units:])
+            h = o * self.__activation(c)
+            if self.__return_sequences:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if self.__return_sequences else h
+
+
+class Dense:
+    def __init__(self, config, weights):
+        self.__activation = ACTIVATIONS[config.get("activation", "linear")]
+        self.__kernel = weights["kernel"]
+        self.__bias = weights.get("bias")
+
+    def __call__(self, x):
+        y = x.dot(self.__kernel)
+        if self.__bias is not None:
+            y = y + self.__bias
+        return self.__activation(y)
+
+
+class Identity:
+    """
+    Layers that do nothing at inference time, e.g. dropout.
+    """
+
+    def __init__(self, config, weights):
+        pass
+
+    def __call__(self, x):
+        return x
+
+
+LAYERS = {
+    "Embedding": Embedding,
+    "LSTM": LSTM,
+    "Dense": Dense,
+    "Dropout": Identity,
+    "SpatialDropout1D": Identity,
+    "InputLayer": Identity,
+}
+
+
+class NumpyModel:
+    """
+    Sequential stack of NumPy layers with the predict methods of a Keras model.
+    """
+
+    def __init__(self, layers):
+        self.__layers = layers
+
+    def predict(self, x, batch_size=None):
+        x = np.asarray(x)
+        if not np.issubdtype(x.dtype, np.integer):
+            x = x.astype(np.float32)
+        for layer in self.__layers:
+            x = layer(x)
+        return x
+
+    def predict_on_batch(self, x):
+        return self.predict(x)
+
+
+def load_model(path):
+    """
+    Loads an .npz file written by model_export.py.
+    """
+    with np.load(path) as data:
+        configs = json.loads(str(data["layers"]))
+        layers = []
+        for index, config in enumerate(configs):
+            prefix = "%d/" % index
+            weights = {key[len(prefix):]: data[key] for key in data.files if key.startswith(prefix)}
+            layers.append(LAYERS[config["class_name"]](config, weights))
+    return NumpyModel(layers)
@@ -6,6 +6,7 @@ import tensorflow as tf
 
 import core.utils as utils
 from core.config import cfg
+from renderer import OverlayCompositor
 
 
 def get_keywords():
@@ -31,9 +32,10 @@ class VisionEngine:
         # should be removed later by changing the classes order in yolo
         self.yolo_mapping = {1: 6, 2: 4, 3: 0, 4: 3, 5: 7, 6: 9, 7: 5, 8: 8, 9: 1, 10: 2}
 
-        self.background = cv2.imread("data/overlay-ar.png")
-        self.background = cv2.resize(self.background, (640, 480))
         self.primary_color = (60, 76, 231)
+        # the text positions of this engine are laid out for its 640x480 frames
+        self.compositor = OverlayCompositor(cv2.imread("data/overlay-ar.png"), self.class_names, self.keywords,
+                                            color=self.primary_color, design_size=(640, 480))
 
         # Load the models into session
         self.detection_graph = tf.Graph()
@@ -154,13 +156,7 @@ class VisionEngine:
         cv2.line(frame, (pt2[0], pt1[1] + 20), (pt2[0], pt2[1] - 20), (80, 62, 44), 1)
 
     def overlay(self, frame, object_id):
-        frame = cv2.addWeighted(frame, 1, self.background, 0.6, 0)
-        cv2.putText(frame, "Object: %s" % self.class_names[object_id], (20, 395), cv2.FONT_HERSHEY_SIMPLEX, 0.75,
-                    self.primary_color, 1)
-        cv2.putText(frame, "Key words: %s" % self.keywords[object_id], (45, 420),
-                    cv2.FONT_HERSHEY_DUPLEX,
-                    0.5, self.primary_color, 1)
-        return frame
+        return self.compositor.composite(frame, object_id)
 
     def draw_bbox(self, image, bboxes, show_label=True):
         """
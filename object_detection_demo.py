@@ -6,6 +6,26 @@ import tensorflow as tf
 
 import core.utils as utils
 from core.config import cfg
+from renderer import FrameRenderer
+
+YOLO_TENSOR_NAMES = ["input/input_data:0",
+                     "pred_sbbox/concat_2:0",
+                     "pred_mbbox/concat_2:0",
+                     "pred_lbbox/concat_2:0"]
+YOLO_NMS_TENSOR_NAMES = ["input/input_data:0",
+                         "postprocess/org_size:0",
+                         "postprocess/bboxes:0"]
+FRCNN_TENSOR_NAMES = ["image_tensor:0",
+                      "detection_boxes:0",
+                      "detection_scores:0",
+                      "detection_classes:0",
+                      "num_detections:0"]
+
+
+def optimized_graph_path(path):
+    """Returns the path the graph optimizer writes the optimized copy of a frozen graph to."""
+    root, ext = os.path.splitext(path)
+    return "%s_optimized%s" % (root, ext)
 
 
 def get_keywords():
@@ -19,11 +39,17 @@ class VisionEngine:
         # define paths to load the models
         self.PATH_TO_FRCNN_CKPT = os.path.join('data', 'models', 'ssd_inception_v7.pb')
         self.PATH_TO_YOLO_CKPT = os.path.join('data', 'models', 'yolo_v3.pb')
+        self.PATH_TO_YOLO_NMS_CKPT = os.path.join('data', 'models', 'yolo_v3_nms.pb')
         self.PATH_TO_LABELS_TFOD_API = os.path.join('data', 'classes', 'labels.pbtxt')
         # define constants
         self.NUM_CLASSES = 10
         self.INPUT_SIZE = 608
         self.VH = config.VH
+        self.YE = config.YE
+        if config.OG == 1:
+            # load the graphs written by graph_optimizer.py instead of the frozen ones
+            self.PATH_TO_FRCNN_CKPT = optimized_graph_path(self.PATH_TO_FRCNN_CKPT)
+            self.PATH_TO_YOLO_CKPT = optimized_graph_path(self.PATH_TO_YOLO_CKPT)
         # load the label map
         # self.category_index = label_map_util.create_category_index_from_labelmap(self.PATH_TO_LABELS_TFOD_API,
         #                                                                          use_display_name=True)
@@ -32,16 +58,21 @@ class VisionEngine:
         # should be removed later by changing the classes order in yolo
         self.yolo_mapping = {1: 6, 2: 4, 3: 0, 4: 3, 5: 7, 6: 9, 7: 5, 8: 8, 9: 1, 10: 2}
 
-        self.background = cv2.imread("data/overlay-ar.png")
-        self.background = cv2.resize(self.background, (672, 504))
-        self.primary_color = (60, 76, 231)
+        self.renderer = FrameRenderer(self.class_names, self.keywords)
 
         # Load the models into session
         self.detection_graph = tf.Graph()
         self.graph_def = tf.GraphDef()
 
         with self.detection_graph.as_default():
-            if self.VH == 1:
+            if self.VH == 1 and self.YE == 1:
+                # yolo graph exported by yolo_nms_export.py, decoding and nms run inside the graph
+                with tf.gfile.GFile(self.PATH_TO_YOLO_NMS_CKPT, 'rb') as fid:
+                    od_graph_def = tf.GraphDef()
+                    serialized_graph = fid.read()
+                    od_graph_def.ParseFromString(serialized_graph)
+                    tf.import_graph_def(od_graph_def, name='')
+            elif self.VH == 1:
                 with tf.gfile.GFile(self.PATH_TO_YOLO_CKPT, 'rb') as fid:
                     od_graph_def = tf.GraphDef()
                     serialized_graph = fid.read()
@@ -58,17 +89,12 @@ class VisionEngine:
         config.gpu_options.allow_growth = True
 
         self.sess = tf.Session(config=config, graph=self.detection_graph)
-        if self.VH == 1:
-            self.yolo_tensors = self.get_tensors(tensor_names=["input/input_data:0",
-                                                               "pred_sbbox/concat_2:0",
-                                                               "pred_mbbox/concat_2:0",
-                                                               "pred_lbbox/concat_2:0"])
+        if self.VH == 1 and self.YE == 1:
+            self.yolo_nms_tensors = self.get_tensors(tensor_names=YOLO_NMS_TENSOR_NAMES)
+        elif self.VH == 1:
+            self.yolo_tensors = self.get_tensors(tensor_names=YOLO_TENSOR_NAMES)
         else:
-            self.frcnn_tensors = self.get_tensors(tensor_names=["image_tensor:0",
-                                                                "detection_boxes:0",
-                                                                "detection_scores:0",
-                                                                "detection_classes:0",
-                                                                "num_detections:0"])
+            self.frcnn_tensors = self.get_tensors(tensor_names=FRCNN_TENSOR_NAMES)
 
     def get_tensors(self, tensor_names):
         return [self.detection_graph.get_tensor_by_name(n) for n in tensor_names]
@@ -76,6 +102,11 @@ class VisionEngine:
     def get_yolo_prediction(self, image, object_id=None, pointing=False):
         image_data = self.yolo_preporcess(image)
         image_data = np.expand_dims(image_data, axis=0)
+        if self.YE == 1:
+            bboxes = self.sess.run(self.yolo_nms_tensors[2],
+                                   feed_dict={self.yolo_nms_tensors[0]: image_data,
+                                              self.yolo_nms_tensors[1]: image.shape[:2]})
+            return self.yolo_nms_bboxes(bboxes, object_id, pointing)
         pred_sbbox, pred_mbbox, pred_lbbox = self.sess.run([
             self.yolo_tensors[1],
             self.yolo_tensors[2],
@@ -119,6 +150,17 @@ class VisionEngine:
             return utils.nms_filter(bboxes, 0.45, method='nms', object_id=object_id)
         return utils.nms(bboxes, 0.45, method='nms')
 
+    def yolo_nms_bboxes(self, bboxes, object_id, pointing):
+        """
+        Applies the class filters of yolo_bboxes to the (N, 6) output of the exported graph.
+        """
+        if pointing:
+            # hands first, the same order nms_pointing returns them in
+            return [bbox for cls in [1, object_id] for bbox in bboxes[bboxes[:, 5] == cls]]
+        elif object_id:
+            return list(bboxes[bboxes[:, 5] == object_id])
+        return list(bboxes)
+
     def frcnn_bboxes(self, image, scores, classes, boxes, num, min_score_thresh):
         image_h, image_w, _ = image.shape
         scores_arr = np.squeeze(scores)
@@ -151,27 +193,13 @@ class VisionEngine:
         cv2.rectangle(image, c1, c2, (255, 255, 0), 2)
 
     def draw_rect(self, frame, pt1, pt2):
-        cv2.rectangle(frame, pt1, pt2, (185, 128, 41), 2)
-        cv2.line(frame, (pt1[0] + 20, pt1[1]), (pt2[0] - 20, pt1[1]), (80, 62, 44), 1)
-        cv2.line(frame, (pt1[0] + 20, pt2[1]), (pt2[0] - 20, pt2[1]), (80, 62, 44), 1)
-        cv2.line(frame, (pt1[0], pt1[1] + 20), (pt1[0], pt2[1] - 20), (80, 62, 44), 1)
-        cv2.line(frame, (pt2[0], pt1[1] + 20), (pt2[0], pt2[1] - 20), (80, 62, 44), 1)
+        self.renderer.draw_rect(frame, pt1, pt2)
 
     def overlay(self, frame, object_id):
-        frame = cv2.addWeighted(frame, 1, self.background, 0.6, 0)
-        cv2.putText(frame, "Object: %s" % self.class_names[object_id], (20, 395), cv2.FONT_HERSHEY_SIMPLEX, 0.75,
-                    self.primary_color, 1)
-        cv2.putText(frame, "Key words: %s" % self.keywords[object_id], (45, 420),
-                    cv2.FONT_HERSHEY_DUPLEX,
-                    0.5, self.primary_color, 1)
-        return frame
+        return self.renderer.overlay(frame, object_id)
 
     def draw_bbox(self, image, bboxes, show_label=True):
         """
         bboxes: [x_min, y_min, x_max, y_max, probability, cls_id] format coordinates.
         """
-
-        for i, bbox in enumerate(bboxes):
-            coordinates = np.array(bbox[:4], dtype=np.int32)
-            c1, c2 = (coordinates[0], coordinates[1]), (coordinates[2], coordinates[3])
-            self.draw_rect(image, c1, c2)
+        self.renderer.draw_bbox(image, bboxes)
@@ -6,6 +6,7 @@ import tensorflow as tf
 
 import core.utils as utils
 from core.config import cfg
+from pointing_resolver import PointingResolver
 from utils import label_map_util
 
 
@@ -174,6 +175,7 @@ def main():
     cap = cv2.VideoCapture(0)
     cap.set(3, 608)
     cap.set(4, 608)
+    resolver = PointingResolver()
     # pos_frame = cap.get(cv2.CAP_PROP_POS_FRAMES)
     while True:
         flag, frame = cap.read()
@@ -181,24 +183,10 @@ def main():
             prev_time = time.time()
 
             bboxes = ve.get_yolo_prediction(frame, object_id=3)
-            index = None
-            d_prev = 1000000
-            hand, hand_coor = None, None
-            for i, bbox in enumerate(bboxes):
-                if bbox[5] == 1:
-                    hand = bbox[:4]
-                    hand_coor = (int(0.125 * hand[2] + 0.875 * hand[0]), int(0.125 * hand[3] + 0.875 * hand[1]))
-                    continue
-                if hand is not None:
-                    obj = 0.5 * bbox[:4]
-                    obj_coor = (int(obj[2] + obj[0]), int(obj[3] + obj[1]))
-                    cv2.line(frame, hand_coor, obj_coor, (44, 62, 80), 2)
-                    d = np.square(hand_coor[0] - obj_coor[0]) + np.square(hand_coor[1] - obj_coor[1])
-                    if d_prev > d:
-                        d_prev = d
-                        index = i
-            if index:
-                ve.draw_bbox(frame, [bboxes[index]])
+            bbox, confidence = resolver.update(bboxes, object_id=3)
+            if bbox is not None:
+                ve.draw_bbox(frame, [bbox])
+                print("selection confidence: %.2f" % confidence)
 
             curr_time = time.time()
             exec_time = curr_time - prev_time
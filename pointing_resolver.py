@@ -0,0 +1,104 @@
+from collections import deque
+
+import numpy as np
+
+from core.utils import bboxes_iou
+
+HAND_CLASS = 1
+
+
+def hand_pointers(hands):
+    """
+    Fingertips of (H, 4+) hand boxes as an (H, 4) array of tip x, tip y, direction x, y. The fingertip is taken 1/8 of
+    the way into the box from its top left corner, as before. A box says nothing about where the finger points, so the
+    direction is left zero and those pointers are scored by distance alone.
+    """
+    hands = np.asarray(hands, dtype=np.float64)[:, :4]
+    tips = 0.875 * hands[:, :2] + 0.125 * hands[:, 2:]
+    return np.concatenate([tips, np.zeros_like(tips)], axis=1)
+
+
+def pointing_scores(pointers, objects, scale):
+    """
+    Returns the (P, O) distance, alignment and score matrices of P pointers against O object boxes. The alignment is
+    the cosine between the pointing direction and the fingertip-to-object direction, 1 for pointers without a
+    direction. The score falls off with the distance over scale and with the misalignment.
+    """
+    pointers = np.asarray(pointers, dtype=np.float64)
+    objects = np.asarray(objects, dtype=np.float64)[:, :4]
+    centers = 0.5 * (objects[:, :2] + objects[:, 2:])
+    offsets = centers[np.newaxis, :, :] - pointers[:, np.newaxis, :2]
+    distances = np.linalg.norm(offsets, axis=2)
+    directions = pointers[:, 2:]
+    norms = np.linalg.norm(directions, axis=1)
+    alignments = np.einsum("pok,pk->po", offsets, directions) / np.maximum(distances * norms[:, np.newaxis], 1e-6)
+    alignments[norms == 0] = 1.
+    scores = np.exp(-distances / scale) * 0.5 * (1. + alignments)
+    return distances, alignments, scores
+
+
+def ray_region(pointer, image_shape, reach=0.6, margin=80):
+    """
+    Returns the (x_min, y_min, x_max, y_max) pixel region around a pointer's ray, from the fingertip to reach times
+    the image diagonal along the direction, widened by margin pixels and clipped to the image.
+    """
+    height, width = image_shape[:2]
+    tip = np.asarray(pointer[:2], dtype=np.float64)
+    end = tip + reach * np.hypot(width, height) * np.asarray(pointer[2:4], dtype=np.float64)
+    x_min, y_min = np.minimum(tip, end) - margin
+    x_max, y_max = np.maximum(tip, end) + margin
+    return (int(np.clip(x_min, 0, width)), int(np.clip(y_min, 0, height)),
+            int(np.clip(x_max, 0, width)), int(np.clip(y_max, 0, height)))
+
+
+class PointingResolver:
+    """
+    Picks the object being pointed at. Every frame, all pointers (fingertips of the detected hands, or rays from the
+    Leap projector) are scored against all candidate boxes at once and the best pair is kept. The selection is
+    smoothed over the last window frames by letting every frame vote, with its score, for the boxes it overlaps. The
+    confidence is the share of the window's frames that picked the winning box, so it measures how steady the
+    selection is and does not depend on how far the object is from the pointer.
+    """
+
+    def __init__(self, window=5, scale=200., iou_threshold=0.5):
+        self.__window = window
+        self.__scale = scale
+        self.__iou_threshold = iou_threshold
+        self.__history = deque(maxlen=window)
+
+    def reset(self):
+        self.__history.clear()
+
+    def update(self, bboxes, object_id=None, pointers=None):
+        """
+        bboxes: [x_min, y_min, x_max, y_max, probability, cls_id] detections of the frame.
+        pointers: (P, 4) pointers, taken from the hand boxes in bboxes when None.
+        Returns (selected box, confidence), or (None, confidence) if nothing was selected in the window.
+        """
+        bboxes = np.array(bboxes, dtype=np.float64).reshape(-1, 6)
+        is_hand = bboxes[:, 5] == HAND_CLASS
+        if pointers is None:
+            pointers = hand_pointers(bboxes[is_hand]) if np.any(is_hand) else np.zeros((0, 4))
+        candidates = bboxes[~is_hand]
+        if object_id is not None:
+            candidates = candidates[candidates[:, 5] == object_id]
+
+        if len(pointers) == 0 or len(candidates) == 0:
+            self.__history.append((None, 0.))
+        else:
+            _, _, scores = pointing_scores(pointers, candidates, self.__scale)
+            _, best = np.unravel_index(np.argmax(scores), scores.shape)
+            self.__history.append((candidates[best], float(scores.max())))
+        return self.get_selection()
+
+    def get_selection(self):
+        selected = [(bbox, score) for bbox, score in self.__history if bbox is not None]
+        if len(selected) == 0:
+            return None, 0.
+        boxes = np.array([bbox for bbox, _ in selected])
+        scores = np.array([score for _, score in selected])
+        overlaps = bboxes_iou(boxes[:, np.newaxis, :4], boxes[np.newaxis, :, :4]) > self.__iou_threshold
+        votes = overlaps.dot(scores)
+        # on a tie the most recent box wins
+        winner = len(votes) - 1 - np.argmax(votes[::-1])
+        return boxes[winner], float(np.count_nonzero(overlaps[winner]) / self.__window)
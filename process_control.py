@@ -1,13 +1,18 @@
+import os
 import time
-from multiprocessing import Process, Queue
+from multiprocessing import Array, Process, Queue
 
-from gestures_recognition_demo import GestureEngine
-from sensor_fusion import FusionEngine
+from leap_calibration import CALIBRATION_PATH, RAY_SIZE
 from speech_recognition_demo import SpeechEngine
 
 
-def start_gesture_recognition(queue: Queue):
-    ge = GestureEngine(queue=queue)
+def start_gesture_recognition(queue: Queue, ray: Array):
+    if os.path.exists(CALIBRATION_PATH):
+        # the Leap engine publishes the pointing ray, it needs libLeap preloaded
+        from gestures_recognition import GestureEngine
+    else:
+        from gestures_recognition_demo import GestureEngine
+    ge = GestureEngine(queue=queue, ray=ray)
     ge.start_prediction()
 
 
@@ -16,8 +21,10 @@ def start_speech_engine(queue: Queue):
     se.start_recognition()
 
 
-def start_fusion_engine(queue: Queue):
-    FusionEngine(_queue=queue)
+def start_fusion_engine(queue: Queue, ray: Array):
+    # imported here so TensorFlow is only loaded in the fusion process
+    from sensor_fusion import FusionEngine
+    FusionEngine(_queue=queue, ray=ray)
 
 
 class ProcessManager:
@@ -26,13 +33,17 @@ class ProcessManager:
 
     def start_engines(self):
         com_queue = Queue()
+        # pointing ray from the gesture engine to the fusion engine
+        ray = Array('d', RAY_SIZE)
         print("Starting Engines...")
 
-        engines = [start_fusion_engine, start_gesture_recognition, start_speech_engine]
-        # engines = [start_fusion_engine, start_gesture_recognition]
-        # engines = [start_fusion_engine, start_speech_engine]
-        for engine in engines:
-            proc = Process(target=engine, args=(com_queue,))
+        engines = [(start_fusion_engine, (com_queue, ray)),
+                   (start_gesture_recognition, (com_queue, ray)),
+                   (start_speech_engine, (com_queue,))]
+        # engines = [(start_fusion_engine, (com_queue, ray)), (start_gesture_recognition, (com_queue, ray))]
+        # engines = [(start_fusion_engine, (com_queue, ray)), (start_speech_engine, (com_queue,))]
+        for engine, args in engines:
+            proc = Process(target=engine, args=args)
             self.procs.append(proc)
             proc.start()
             time.sleep(5)
@@ -0,0 +1,129 @@
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+
+class SessionRecorder:
+    """
+    Writes annotated frames to video files on a dedicated encoder thread. write() never blocks: frames wait in a
+    bounded queue and when it is full the oldest frame is dropped (drop_oldest=True) or the new one is. The output is
+    rotated to a new file once it grows past max_bytes or has been open for max_seconds. If a file cannot be opened,
+    e.g. for an unsupported codec or an unwritable directory, recording stops with an error and later frames are
+    ignored.
+    """
+
+    def __init__(self, directory="recordings", fps=15, fourcc="MJPG", extension="avi", queue_size=30,
+                 drop_oldest=True, max_bytes=512 * 1024 * 1024, max_seconds=600):
+        self.__directory = directory
+        self.__fps = fps
+        self.__fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.__extension = extension
+        self.__queue = queue.Queue(queue_size)
+        self.__drop_oldest = drop_oldest
+        self.__max_bytes = max_bytes
+        self.__max_seconds = max_seconds
+        self.__writer = None
+        self.__path = None
+        self.__size = None
+        self.__opened_at = 0.
+        self.__written = 0
+        self.__dropped = 0
+        self.__files = []
+        self.__running = False
+        self.__thread = None
+        self.__error = None
+
+    def start(self):
+        os.makedirs(self.__directory, exist_ok=True)
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__record, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Writes the frames still in the queue and closes the current file.
+        """
+        self.__running = False
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def write(self, frame):
+        if self.__error is not None:
+            return
+        try:
+            self.__queue.put_nowait(frame)
+            return
+        except queue.Full:
+            pass
+        self.__dropped += 1
+        if self.__drop_oldest:
+            try:
+                self.__queue.get_nowait()
+                self.__queue.put_nowait(frame)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def get_metrics(self):
+        return {"written": self.__written,
+                "dropped": self.__dropped,
+                "queued": self.__queue.qsize(),
+                "files": len(self.__files),
+                "error": self.__error}
+
+    def report(self):
+        report = "written: %(written)d, dropped: %(dropped)d, queued: %(queued)d, files: %(files)d" % self.get_metrics()
+        if self.__error is not None:
+            report += ", error: %s" % self.__error
+        return report
+
+    def __record(self):
+        while self.__running or not self.__queue.empty():
+            try:
+                frame = self.__queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            size = (frame.shape[1], frame.shape[0])
+            # a video file holds frames of a single size
+            if self.__writer is None or size != self.__size or self.__should_rotate():
+                if not self.__open(size):
+                    break
+            self.__writer.write(frame)
+            self.__written += 1
+        self.__close()
+
+    def __should_rotate(self):
+        if time.time() - self.__opened_at > self.__max_seconds:
+            return True
+        # the container size is only checked once a second of video has been written
+        if self.__written % self.__fps != 0:
+            return False
+        try:
+            return os.path.getsize(self.__path) > self.__max_bytes
+        except OSError:
+            # some backends only create the file once enough data was buffered
+            return False
+
+    def __open(self, size):
+        self.__close()
+        self.__path = os.path.join(self.__directory, "session_%d_%03d.%s" % (time.time(), len(self.__files),
+                                                                             self.__extension))
+        self.__writer = cv2.VideoWriter(self.__path, self.__fourcc, self.__fps, size)
+        if not self.__writer.isOpened():
+            self.__writer.release()
+            self.__writer = None
+            self.__error = "could not open %s" % self.__path
+            print("[Recorder] Recording stopped, %s" % self.__error)
+            return False
+        self.__size = size
+        self.__opened_at = time.time()
+        self.__files.append(self.__path)
+        return True
+
+    def __close(self):
+        if self.__writer is not None:
+            self.__writer.release()
+            self.__writer = None
@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+
+
+def make_packet(frame, boxes=(), message=None, overlay=None):
+    """
+    Frame reference plus the metadata the renderer draws on it.
+    boxes: [x_min, y_min, x_max, y_max, ...] format coordinates.
+    overlay: object id whose AR overlay should be shown, or None.
+    """
+    return {"frame": frame, "boxes": boxes, "message": message, "overlay": overlay}
+
+
+class OverlayCompositor:
+    """
+    Adds the AR overlay to frames in place. The text is laid out for design_size frames, the frame size of the caller,
+    and scaled for every other frame size. The overlay is resized once per frame size and only the bounding region of
+    its non-empty pixels is blended. The text lines are rendered once into sprites and copied onto the frame through
+    their masks.
+    """
+
+    def __init__(self, background, class_names, keywords, weight=0.6, color=(60, 76, 231), design_size=(672, 504)):
+        self.__background = background
+        self.__design_size = design_size
+        self.__class_names = class_names
+        self.__keywords = keywords
+        self.__weight = weight
+        self.__color = color
+        self.__layers = {}
+        self.__sprites = {}
+
+    def get_layer(self, width, height):
+        """
+        Returns (x, y, weighted overlay region) for the frame size, or None if the overlay is empty.
+        """
+        key = (width, height)
+        if key not in self.__layers:
+            background = cv2.resize(self.__background, (width, height))
+            mask = np.any(background > 0, axis=2)
+            ys, xs = np.nonzero(mask)
+            if len(xs) == 0:
+                self.__layers[key] = None
+            else:
+                region = background[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+                # frame + weight * background, with the background term rounded once here
+                self.__layers[key] = (xs.min(), ys.min(), cv2.convertScaleAbs(region, alpha=self.__weight))
+        return self.__layers[key]
+
+    def get_sprite(self, text, font, scale):
+        """
+        Returns (sprite, mask, baseline offset) of a text line.
+        """
+        key = (text, font, scale)
+        if key not in self.__sprites:
+            (text_w, text_h), baseline = cv2.getTextSize(text, font, scale, 1)
+            # a few pixels of margin, hershey glyphs can reach slightly past the reported size
+            sprite = np.zeros((text_h + baseline + 4, text_w + 4, 3), dtype=np.uint8)
+            cv2.putText(sprite, text, (2, text_h + 2), font, scale, self.__color, 1)
+            self.__sprites[key] = (sprite, np.any(sprite > 0, axis=2), text_h + 2)
+        return self.__sprites[key]
+
+    def paste(self, frame, sprite, mask, x, y):
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + sprite.shape[1], frame_w), min(y + sprite.shape[0], frame_h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        np.copyto(frame[y0:y1, x0:x1], sprite[y0 - y:y1 - y, x0 - x:x1 - x],
+                  where=mask[y0 - y:y1 - y, x0 - x:x1 - x, np.newaxis])
+
+    def composite(self, frame, object_id):
+        frame_h, frame_w = frame.shape[:2]
+        layer = self.get_layer(frame_w, frame_h)
+        if layer is not None:
+            x, y, region = layer
+            roi = frame[y:y + region.shape[0], x:x + region.shape[1]]
+            roi[...] = cv2.add(roi, region)
+
+        scale_x, scale_y = frame_w / self.__design_size[0], frame_h / self.__design_size[1]
+        lines = [("Object: %s" % self.__class_names[object_id], cv2.FONT_HERSHEY_SIMPLEX, 0.75, (20, 395)),
+                 ("Key words: %s" % self.__keywords[object_id], cv2.FONT_HERSHEY_DUPLEX, 0.5, (45, 420))]
+        for text, font, scale, (text_x, text_y) in lines:
+            sprite, mask, offset = self.get_sprite(text, font, scale)
+            self.paste(frame, sprite, mask, int(text_x * scale_x) - 2, int(text_y * scale_y) - offset)
+        return frame
+
+
+class FrameRenderer:
+    """
+    Draws detections, messages and the AR overlay on frames. Runs in the visualizer so the fusion loop only sends
+    metadata along with the frame.
+    """
+
+    def __init__(self, class_names, keywords):
+        self.class_names = class_names
+        self.keywords = keywords
+        self.primary_color = (60, 76, 231)
+        self.compositor = OverlayCompositor(cv2.imread("data/overlay-ar.png"), class_names, keywords,
+                                            color=self.primary_color)
+
+    def render(self, packet):
+        frame = packet["frame"]
+        if packet["overlay"] is not None:
+            frame = self.overlay(frame, packet["overlay"])
+        if packet["message"]:
+            self.draw_message(frame, packet["message"])
+        self.draw_bbox(frame, packet["boxes"])
+        return frame
+
+    def draw_message(self, frame, message):
+        cv2.putText(frame, message, (20, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 2)
+
+    def draw_rect(self, frame, pt1, pt2):
+        cv2.rectangle(frame, pt1, pt2, (185, 128, 41), 2)
+        cv2.line(frame, (pt1[0] + 20, pt1[1]), (pt2[0] - 20, pt1[1]), (80, 62, 44), 1)
+        cv2.line(frame, (pt1[0] + 20, pt2[1]), (pt2[0] - 20, pt2[1]), (80, 62, 44), 1)
+        cv2.line(frame, (pt1[0], pt1[1] + 20), (pt1[0], pt2[1] - 20), (80, 62, 44), 1)
+        cv2.line(frame, (pt2[0], pt1[1] + 20), (pt2[0], pt2[1] - 20), (80, 62, 44), 1)
+
+    def overlay(self, frame, object_id):
+        return self.compositor.composite(frame, object_id)
+
+    def draw_bbox(self, image, bboxes):
+        """
+        bboxes: [x_min, y_min, x_max, y_max, probability, cls_id] format coordinates.
+        Draws the draw_rect decoration of every box with two polylines calls.
+        """
+        if len(bboxes) == 0:
+            return
+        x_min, y_min, x_max, y_max = np.array([bbox[:4] for bbox in bboxes]).astype(np.int32).T
+        rects = np.stack([x_min, y_min, x_max, y_min, x_max, y_max, x_min, y_max], axis=1).reshape(-1, 4, 2)
+        lines = np.stack([x_min + 20, y_min, x_max - 20, y_min,
+                          x_min + 20, y_max, x_max - 20, y_max,
+                          x_min, y_min + 20, x_min, y_max - 20,
+                          x_max, y_min + 20, x_max, y_max - 20], axis=1).reshape(-1, 2, 2)
+        cv2.polylines(image, list(rects), True, (185, 128, 41), 2)
+        cv2.polylines(image, list(lines), False, (80, 62, 44), 1)
@@ -0,0 +1,223 @@
+"""
+Compact binary stream of the per-frame detection results, for AR clients that draw the boxes themselves.
+
+A datagram holds one frame:
+    header    <2sBBIIdH  magic, version, flags, frame id, base frame id, timestamp, number of boxes
+    message   <H + utf-8 bytes, only if FLAG_MESSAGE is set (an empty message clears it)
+    boxes     keyframe: <BHHHHB per box, class id, x_min, y_min, x_max, y_max, score * 255
+              delta:    <bbbbbb per box, the same fields as differences to the base frame
+A delta frame has the boxes of its base frame in the same order, the box index is the track id. FLAG_UNCHANGED means
+the boxes equal the base frame and carries no box data. Without FLAG_MESSAGE the message of the base frame stays.
+
+Publish synthetic boxes and measure latency and bandwidth on the same host with
+    python result_stream.py --listen
+    python result_stream.py --demo
+"""
+import argparse
+import socket
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"RS"
+VERSION = 1
+
+FLAG_KEYFRAME = 1
+FLAG_MESSAGE = 2
+FLAG_UNCHANGED = 4
+
+HEADER = struct.Struct("<2sBBIIdH")
+MESSAGE_LENGTH = struct.Struct("<H")
+KEY_BOX = struct.Struct("<BHHHHB")
+DELTA_BOX = struct.Struct("<bbbbbb")
+
+# class id of boxes that carry none, e.g. tracker output
+UNKNOWN_CLASS = 255
+
+# longest message in utf-8 bytes, longer ones are cut on a character boundary
+MAX_MESSAGE_BYTES = 1024
+
+
+def quantize(boxes, object_id=None):
+    """
+    Converts [x_min, y_min, x_max, y_max(, score, class)] boxes to an (N, 6) int array of class, coordinates and score.
+    Boxes without a class get object_id, boxes without a score get 1.
+    """
+    default_class = UNKNOWN_CLASS if object_id is None else int(object_id)
+    rows = []
+    for box in boxes:
+        score = box[4] if len(box) > 4 else 1.
+        cls = int(box[5]) if len(box) > 5 else default_class
+        rows.append([cls] + [int(round(c)) for c in box[:4]] + [int(round(score * 255))])
+    quantized = np.array(rows, dtype=np.int64).reshape(-1, 6)
+    quantized[:, 1:5] = np.clip(quantized[:, 1:5], 0, 65535)
+    quantized[:, 5] = np.clip(quantized[:, 5], 0, 255)
+    return quantized
+
+
+def encode(frame_id, timestamp, boxes, message=None, base=None):
+    """
+    Encodes quantized boxes, as a delta to base = (frame id, boxes, message) of the previous frame if the boxes allow.
+    """
+    flags = 0
+    base_id = frame_id
+    payload = b""
+    if base is not None and len(base[1]) == len(boxes) and np.array_equal(base[1][:, 0], boxes[:, 0]):
+        deltas = boxes - base[1]
+        if np.all(np.abs(deltas) <= 127):
+            base_id = base[0]
+            if not deltas.any():
+                flags |= FLAG_UNCHANGED
+            else:
+                payload = b"".join(DELTA_BOX.pack(*row) for row in deltas.tolist())
+    if base_id == frame_id:
+        flags |= FLAG_KEYFRAME
+        payload = b"".join(KEY_BOX.pack(*row) for row in boxes.tolist())
+
+    text = b""
+    if (message if flags & FLAG_KEYFRAME else message != base[2]):
+        flags |= FLAG_MESSAGE
+        text = (message or "").encode("utf-8")[:MAX_MESSAGE_BYTES].decode("utf-8", "ignore").encode("utf-8")
+        text = MESSAGE_LENGTH.pack(len(text)) + text
+    return HEADER.pack(MAGIC, VERSION, flags, frame_id, base_id, timestamp, len(boxes)) + text + payload
+
+
+class ResultDecoder:
+    """
+    Rebuilds frames from datagrams. Delta frames whose base frame was lost are skipped until the next keyframe.
+    """
+
+    def __init__(self):
+        self.__frame_id = None
+        self.__boxes = None
+        self.__message = None
+        self.__skipped = 0
+
+    def decode(self, data):
+        """
+        Returns {"frame_id", "timestamp", "boxes", "message"}, with boxes as an (N, 6) int array of class,
+        coordinates and score * 255, or None if the frame could not be decoded.
+        """
+        magic, version, flags, frame_id, base_id, timestamp, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        if not flags & FLAG_KEYFRAME and base_id != self.__frame_id:
+            self.__skipped += 1
+            return None
+
+        offset = HEADER.size
+        message = None if flags & FLAG_KEYFRAME else self.__message
+        if flags & FLAG_MESSAGE:
+            length, = MESSAGE_LENGTH.unpack_from(data, offset)
+            offset += MESSAGE_LENGTH.size
+            message = data[offset:offset + length].decode("utf-8") or None
+            offset += length
+
+        if flags & FLAG_KEYFRAME:
+            boxes = np.array([KEY_BOX.unpack_from(data, offset + i * KEY_BOX.size) for i in range(count)],
+                             dtype=np.int64).reshape(-1, 6)
+        elif flags & FLAG_UNCHANGED:
+            boxes = self.__boxes
+        else:
+            boxes = self.__boxes + np.array([DELTA_BOX.unpack_from(data, offset + i * DELTA_BOX.size)
+                                             for i in range(count)], dtype=np.int64).reshape(-1, 6)
+
+        self.__frame_id, self.__boxes, self.__message = frame_id, boxes, message
+        return {"frame_id": frame_id, "timestamp": timestamp, "boxes": boxes, "message": message}
+
+    def get_skipped(self):
+        return self.__skipped
+
+
+class ResultPublisher:
+    """
+    Sends the detection results of every frame to a UDP address. A keyframe is forced every keyframe_interval frames
+    so a client that lost a datagram recovers quickly.
+    """
+
+    def __init__(self, address=("127.0.0.1", 5005), keyframe_interval=15):
+        self.__address = address
+        self.__keyframe_interval = keyframe_interval
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__socket.setblocking(False)
+        self.__base = None
+        self.__frames = 0
+        self.__bytes = 0
+        self.__dropped = 0
+
+    def publish(self, frame_id, boxes, message=None, object_id=None, timestamp=None):
+        boxes = quantize(boxes, object_id)
+        base = None if self.__frames % self.__keyframe_interval == 0 else self.__base
+        data = encode(frame_id, time.time() if timestamp is None else timestamp, boxes, message, base)
+        try:
+            self.__socket.sendto(data, self.__address)
+        except (BlockingIOError, OSError):
+            # a lost frame breaks the delta chain, start again from a keyframe
+            self.__dropped += 1
+            self.__base = None
+            return
+        self.__base = (frame_id, boxes, message)
+        self.__frames += 1
+        self.__bytes += len(data)
+
+    def get_metrics(self):
+        return {"frames": self.__frames, "bytes": self.__bytes, "dropped": self.__dropped}
+
+    def close(self):
+        self.__socket.close()
+
+
+def listen(port, report_interval=1.0):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("0.0.0.0", port))
+    decoder = ResultDecoder()
+    latencies, received, frames = [], 0, 0
+    started = time.time()
+    print("Listening on port %d" % port)
+    while True:
+        data = sock.recv(65535)
+        result = decoder.decode(data)
+        received += len(data)
+        if result is not None:
+            frames += 1
+            # sender and receiver share the clock when run on the same host
+            latencies.append(time.time() - result["timestamp"])
+        elapsed = time.time() - started
+        if elapsed >= report_interval and latencies:
+            print("%6.1f fps %9.1f B/s %8.1f B/frame   latency mean %.3f ms p95 %.3f ms   skipped %d" % (
+                frames / elapsed, received / elapsed, received / max(frames, 1),
+                np.mean(latencies) * 1000, np.percentile(latencies, 95) * 1000, decoder.get_skipped()))
+            latencies, received, frames = [], 0, 0
+            started = time.time()
+
+
+def demo(port, fps=30, objects=5):
+    """
+    Publishes boxes that drift a few pixels a frame, the way tracked objects move.
+    """
+    publisher = ResultPublisher(("127.0.0.1", port))
+    rng = np.random.RandomState(0)
+    boxes = np.concatenate([rng.uniform(50, 400, (objects, 2)), np.zeros((objects, 2)),
+                            rng.uniform(0.5, 1., (objects, 1)), rng.randint(0, 80, (objects, 1))], axis=1)
+    boxes[:, 2:4] = boxes[:, 0:2] + 60
+    frame_id = 0
+    while True:
+        boxes[:, :4] += np.tile(rng.randint(-2, 3, (objects, 2)), 2)
+        publisher.publish(frame_id, boxes, "Objects found...")
+        frame_id += 1
+        time.sleep(1. / fps)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--listen", action="store_true", help="measure latency and bandwidth of a stream")
+    parser.add_argument("--demo", action="store_true", help="publish synthetic detections")
+    args = parser.parse_args()
+    if args.listen:
+        listen(args.port)
+    elif args.demo:
+        demo(args.port)
+    else:
+        parser.print_help()
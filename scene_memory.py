@@ -0,0 +1,70 @@
+import threading
+import time
+
+import numpy as np
+
+from core.utils import bboxes_iou
+from motion_gate import MotionGate
+
+
+def bboxes_match(bboxes, other_bboxes, iou_threshold=0.5):
+    """
+    True if both lists hold the same number of boxes and every box of the first overlaps one of the second.
+    """
+    if len(bboxes) != len(other_bboxes):
+        return False
+    if len(bboxes) == 0:
+        return True
+    others = np.array([bbox[:4] for bbox in other_bboxes])
+    return all(np.max(bboxes_iou(np.array(bbox[:4])[np.newaxis, :], others)) > iou_threshold for bbox in bboxes)
+
+
+class SceneMemory:
+    """
+    Last confirmed boxes of every class, with the time they were seen and their best score. The memory is cleared
+    whenever the motion gate sees the camera or the scene change, so whatever it returns was seen in the current view.
+    """
+
+    def __init__(self, max_age=30.0, gate=None):
+        self.__max_age = max_age
+        self.__gate = gate if gate is not None else MotionGate(threshold=10.0)
+        self.__objects = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, frame):
+        if self.__gate.update(frame):
+            self.invalidate()
+
+    def invalidate(self):
+        with self.__lock:
+            self.__objects = {}
+
+    def record(self, bboxes, object_id=None):
+        """
+        Stores the result of a detector run. An all-class run (object_id is None) replaces the whole memory, a
+        filtered run replaces only its class, and a class that was searched for and not found is forgotten.
+        """
+        timestamp = time.time()
+        found = {}
+        for bbox in bboxes:
+            found.setdefault(int(bbox[5]), []).append(bbox)
+        with self.__lock:
+            if object_id is None:
+                self.__objects = {}
+            else:
+                self.__objects.pop(object_id, None)
+                found = {object_id: found[object_id]} if object_id in found else {}
+            for cls, cls_bboxes in found.items():
+                self.__objects[cls] = {"bboxes": cls_bboxes,
+                                       "timestamp": timestamp,
+                                       "confidence": max(float(bbox[4]) for bbox in cls_bboxes)}
+
+    def recall(self, object_id):
+        """
+        Returns the remembered entry ({"bboxes", "timestamp", "confidence"}) of the class, or None.
+        """
+        with self.__lock:
+            entry = self.__objects.get(object_id)
+        if entry is None or time.time() - entry["timestamp"] > self.__max_age:
+            return None
+        return entry
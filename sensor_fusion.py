@@ -6,6 +6,22 @@ import numpy as np
 from multiprocessing import Queue
 from utils.logger import Logger
 from config import config
+from motion_gate import MotionGate, GatedDetector
+from detection_cache import DetectionCache, CachedDetector
+from scene_memory import SceneMemory, bboxes_match
+from renderer import make_packet
+from pointing_resolver import PointingResolver, ray_region
+from leap_calibration import read_ray
+
+
+# seconds a speculative detection stays valid for the command that follows the speech
+SPECULATION_TTL = 5.0
+
+# share of the pointing window that has to agree on an object before it is taken as selected
+POINTING_CONFIDENCE = 0.6
+
+# UDP address of the AR client that receives the detection results
+RESULT_STREAM_ADDRESS = ("127.0.0.1", 5005)
 
 
 class Timer:
@@ -25,7 +41,7 @@ class Timer:
 
 
 class FusionEngine:
-    def __init__(self, _queue: Queue):
+    def __init__(self, _queue: Queue, ray=None):
         from object_detection_demo import VisionEngine
         self.__image_oqueue = queue.Queue(5)
         self.__last_operation = None
@@ -35,9 +51,31 @@ class FusionEngine:
             self.__default_object_detector = self.__vision_engine.get_yolo_prediction
         else:
             self.__default_object_detector = self.__vision_engine.get_frcnn_prediction
+        if config.DC == 1:
+            # reuse the detections of frames that were already seen
+            self.__detection_cache = CachedDetector(self.__default_object_detector, DetectionCache(),
+                                                    self.__vision_engine.INPUT_SIZE)
+            self.__default_object_detector = self.__detection_cache
+        # crops of the frame skip the motion gate, its detections are only keyed by the class filter and would be
+        # boxes of the full frame
+        self.__region_object_detector = self.__default_object_detector
+        if config.MG == 1:
+            # reuse the last detections while the scene stays still
+            self.__motion_gate = GatedDetector(self.__default_object_detector, MotionGate())
+            self.__default_object_detector = self.__motion_gate
+        self.__scene_memory = SceneMemory()
+        self.__speculative_memory = SceneMemory(max_age=SPECULATION_TTL)
+        self.__pointing_resolver = PointingResolver()
+        # index finger ray in camera pixels, published by the GestureEngine, see leap_calibration
+        self.__ray = ray
         self.__is_zoomed = False
         self.__selection_timer = Timer(5)
         self.__logger = Logger("frame")
+        self.__frame_id = 0
+        self.__result_publisher = None
+        if config.RS == 1:
+            from result_stream import ResultPublisher
+            self.__result_publisher = ResultPublisher(RESULT_STREAM_ADDRESS)
 
         # Initialize webcam feed
         # self.capture = cv2.VideoCapture(0)
@@ -50,18 +88,22 @@ class FusionEngine:
         while True:
             try:
                 image = self.get_image()
+                if config.SM == 1:
+                    self.__scene_memory.observe(image)
+                if config.SD == 1 or config.PH == 1:
+                    self.__speculative_memory.observe(image)
                 if not self.__queue.empty():
                     self.__last_operation = self.__queue.get()
 
                 if self.__last_operation is None:
-                    self.__image_oqueue.put(image)
+                    self.emit_packet(make_packet(image))
                     continue
                 elif self.__last_operation["operation"] == "Locate":
                     '''Performing locating object - no mixing with gestures'''
 
                     # Find the objects for given object id with SSD
-                    self.__image_oqueue.put(image)
-                    bboxes = self.search_objects(self.__last_operation["object_id"])
+                    self.emit_packet(make_packet(image))
+                    bboxes = self.find_objects(self.__last_operation)
 
                     # if len(bboxes) == 0:
                     #     ''' No objects identified with SSD. Change the detecion algorithm to yolo'''
@@ -90,21 +132,23 @@ class FusionEngine:
                             self.track_objects(bboxes, image, self.__last_operation["object_id"], "More than one object found...")
 
                 elif self.__last_operation["operation"] == "Describe":
-                    self.__image_oqueue.put(image)
+                    self.emit_packet(make_packet(image))
 
                     if self.__last_operation["pointing"]:
                         '''Pointing should be done to identify the object'''
-                        # object_bbox = self.get_selection(self.__last_operation["object_id"])
-                        #
-                        # '''Tracking the object'''
-                        # if object_bbox is not None:
-                        #     self.track_objects([object_bbox], image, self.__last_operation["object_id"], "Object has been selected...", True)
-
-                        # self.__default_object_detector = self.__vision_engine.get_frcnn_prediction
-                        self.__last_operation = None
+                        if not self.can_point():
+                            self.show_message("Pointing is not available...")
+                        else:
+                            object_bbox = self.get_selection(self.__last_operation["object_id"])
+
+                            '''Tracking the object'''
+                            if object_bbox is not None:
+                                self.track_objects([object_bbox], image, self.__last_operation["object_id"], "Object has been selected...", True)
+                            else:
+                                self.show_message("No object was pointed out...")
                     else:
                         # Find the objects for given object id with SSD
-                        bboxes = self.search_objects(self.__last_operation["object_id"])
+                        bboxes = self.find_objects(self.__last_operation)
 
                         # if len(bboxes) == 0:
                         #     ''' No objects identified with SSD. Change the detecion algorithm to yolo'''
@@ -131,51 +175,87 @@ class FusionEngine:
                             else:
                                 ''' Speech command was given to identify only one object, pointing is required'''
                                 '''Pointing should be done to identify the object'''
-                                # object_bbox = self.get_selection(self.__last_operation["object_id"])
-                                #
-                                # '''Tracking the object'''
-                                # if object_bbox is not None:
-                                #     self.track_objects([object_bbox], image, self.__last_operation["object_id"], "Object has been selected...", True)
-
+                                if not self.can_point():
+                                    self.show_message("More than one object found...")
+                                else:
+                                    object_bbox = self.get_selection(self.__last_operation["object_id"])
+
+                                    '''Tracking the object'''
+                                    if object_bbox is not None:
+                                        self.track_objects([object_bbox], image, self.__last_operation["object_id"], "Object has been selected...", True)
+
+                elif self.__last_operation["operation"] == "SpeechStarted":
+                    if config.SD == 1:
+                        self.speculate(image)
+                elif self.__last_operation["operation"] == "Prefetch":
+                    if config.PH == 1:
+                        self.prefetch(image, self.__last_operation["object_id"])
+                elif self.__last_operation["operation"] == "Confirm":
+                    self.confirm_objects(image, self.__last_operation["command"], self.__last_operation["bboxes"])
                 elif self.__last_operation["operation"] == "ZoomIn":
                     self.__is_zoomed = True
                 elif self.__last_operation["operation"] == "ZoomOut":
                     self.__is_zoomed = False
-                self.__image_oqueue.put(image)
+                self.emit_packet(make_packet(image))
                 self.__last_operation = None
 
             except KeyboardInterrupt:
+                if config.DC == 1:
+                    print("[Detection Cache]", self.__detection_cache.report())
+                if config.MG == 1:
+                    print("[Motion Gate]", self.__motion_gate.report())
                 self.__logger.close()
                 break
         # self.capture.release()
 
+    def can_point(self):
+        """
+        Pointing needs either the Leap ray or the YOLO hand detector, which the VisionEngine only loads with VH.
+        """
+        return config.VH == 1 or read_ray(self.__ray) is not None
+
     def point_out(self, image, object_id):
-        bboxes = self.__vision_engine.get_yolo_prediction(image, object_id=object_id, pointing=True)
-        index = None
-        d_prev = 1000000
-        hand, hand_coor = None, None
-        for i, bbox in enumerate(bboxes):
-            if bbox[5] == 1:
-                hand = bbox[:4]
-                hand_coor = (int(0.125 * hand[2] + 0.875 * hand[0]),
-                             int(0.125 * hand[3] + 0.875 * hand[1]))
-                continue
-            if hand is not None:
-                obj = 0.5 * bbox[:4]
-                obj_coor = (int(obj[2] + obj[0]), int(obj[3] + obj[1]))
-                # cv2.line(image, hand_coor, obj_coor, (44, 62, 80), 2)
-                d = np.square(hand_coor[0] - obj_coor[0]) + np.square(hand_coor[1] - obj_coor[1])
-                if d_prev > d:
-                    d_prev = d
-                    index = i
-        if index:
-            self.__vision_engine.draw_bbox(image, [bboxes[index]])
-            return bboxes[index]
-        return None
+        """
+        Returns (box of the object pointed at, confidence) over the last few frames, see PointingResolver. Uses the
+        Leap finger ray when one was published recently, else the hands YOLO finds in the frame.
+        """
+        pointers = read_ray(self.__ray)
+        if pointers is None:
+            if config.VH != 1:
+                # the ray was lost and there is no hand detector to fall back on
+                return self.__pointing_resolver.update([], object_id)
+            # no Leap ray, find the hands with YOLO
+            bboxes = self.__vision_engine.get_yolo_prediction(image, object_id=object_id, pointing=True)
+            return self.__pointing_resolver.update(bboxes, object_id)
+
+        # only the objects along the ray are needed
+        x_min, y_min, x_max, y_max = ray_region(pointers[0], image.shape)
+        if x_max <= x_min or y_max <= y_min:
+            return self.__pointing_resolver.update([], object_id, pointers=pointers)
+        region = np.ascontiguousarray(image[y_min:y_max, x_min:x_max])
+        bboxes = [np.concatenate([np.asarray(bbox[:4]) + [x_min, y_min, x_min, y_min], bbox[4:6]])
+                  for bbox in self.__region_object_detector(region, object_id)]
+        return self.__pointing_resolver.update(bboxes, object_id, pointers=pointers)
+
+    def emit_packet(self, packet):
+        """
+        Queues a frame packet for the visualizer and sends its detection results to the result stream.
+        """
+        if self.__result_publisher is not None:
+            object_id = self.__last_operation.get("object_id") if self.__last_operation is not None else None
+            self.__result_publisher.publish(self.__frame_id, packet["boxes"], packet["message"], object_id)
+        self.__frame_id += 1
+        self.__image_oqueue.put(packet)
 
     def image_dequeue(self):
+        """
+        Returns the next frame packet, see renderer.make_packet.
+        """
         return self.__image_oqueue.get()
 
+    def get_renderer(self):
+        return self.__vision_engine.renderer
+
     def image_is_none(self):
         return self.__image_oqueue.empty()
 
@@ -206,29 +286,73 @@ class FusionEngine:
             self.__logger.start()
             image = self.get_image()
             success, bboxes = trackers.update(image)
-            if overlay:
-                image = self.__vision_engine.overlay(image, self.__last_operation["object_id"])
-            if success:
-                for bbox in bboxes:
-                    p1 = (int(bbox[0]), int(bbox[1]))
-                    p2 = (int(bbox[0] + bbox[2]), int(bbox[1] + bbox[3]))
-                    cv2.putText(image, message, (20, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 2)
-                    self.__vision_engine.draw_rect(image, p1, p2)
-            else:
-                cv2.putText(image,
-                            "Tracking Failed",
-                            (20, 20),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.75,
-                            (0, 0, 255),
-                            2)
-            self.__image_oqueue.put(image)
+            boxes = [(int(bbox[0]), int(bbox[1]), int(bbox[0] + bbox[2]), int(bbox[1] + bbox[3])) for bbox in bboxes]
+            self.emit_packet(make_packet(image,
+                                         boxes if success else [],
+                                         message if success else "Tracking Failed",
+                                         self.__last_operation["object_id"] if overlay else None))
             self.__logger.checkpoint("track for %d objects" % len(bboxes))
             self.__selection_timer.count()
 
         self.__selection_timer.reset()
         self.__logger.save()
 
+    def find_objects(self, operation):
+        """
+        Returns the remembered boxes of the object at once when the scene memory has them, and queues a confirmation
+        with the detector as the next operation. Falls back to a full search otherwise.
+        """
+        if config.SD == 1 or config.PH == 1:
+            speculated = self.__speculative_memory.recall(operation["object_id"])
+            # speculative and prefetched detections serve only the command that follows them, prefetches of
+            # other objects are dropped here
+            self.__speculative_memory.invalidate()
+            if speculated is not None:
+                return speculated["bboxes"]
+        if config.SM == 1:
+            remembered = self.__scene_memory.recall(operation["object_id"])
+            if remembered is not None:
+                if not operation.get("confirmed", False):
+                    # confirmed on the fusion loop after this command, the detector and camera are not thread safe
+                    self.__queue.put({"operation": "Confirm", "command": operation, "bboxes": remembered["bboxes"]})
+                return remembered["bboxes"]
+        return self.search_objects(operation["object_id"])
+
+    def confirm_objects(self, image, operation, bboxes):
+        """
+        Runs the detector on the frame and, if it disagrees with the boxes that were shown, updates the scene memory
+        and issues the command again so the corrected boxes are shown.
+        """
+        detected = self.__default_object_detector(image, operation["object_id"])
+        self.__scene_memory.record(detected, operation["object_id"])
+        if not bboxes_match(bboxes, detected):
+            self.__queue.put(dict(operation, confirmed=True))
+
+    def speculate(self, image):
+        """
+        Runs an all-class detection while the user is still speaking, so the command can be answered without waiting
+        for the detector.
+        """
+        self.__logger.add_flog("speculative_detection")
+        self.__logger.start()
+        bboxes = self.__default_object_detector(image)
+        self.__logger.checkpoint("speculate %d objects" % len(bboxes))
+        self.__logger.save()
+        self.__speculative_memory.record(bboxes)
+        if config.SM == 1:
+            self.__scene_memory.record(bboxes)
+
+    def prefetch(self, image, object_id):
+        """
+        Runs a detection filtered to an object mentioned in a partial transcript, ahead of the final command.
+        """
+        self.__logger.add_flog("prefetch_detection")
+        self.__logger.start()
+        bboxes = self.__default_object_detector(image, object_id)
+        self.__logger.checkpoint("prefetch %d objects" % len(bboxes))
+        self.__logger.save()
+        self.__speculative_memory.record(bboxes, object_id)
+
     def search_objects(self, object_id):
         bboxes = None
         self.__logger.add_flog("object_detection")
@@ -237,24 +361,24 @@ class FusionEngine:
             self.__logger.start()
             image = self.get_image()
             bboxes = self.__default_object_detector(image, object_id)
-            cv2.putText(image, "Searching...", (20, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 2)
-            self.__vision_engine.draw_bbox(image, bboxes)
-            self.__image_oqueue.put(image)
+            self.emit_packet(make_packet(image, bboxes, "Searching..."))
             self.__logger.checkpoint("search for %d objects" % len(bboxes))
         self.__selection_timer.reset()
         self.__logger.save()
+        if config.SM == 1:
+            self.__scene_memory.record(bboxes, object_id)
         return bboxes
 
     def get_selection(self, object_id):
         object_bbox = None
+        self.__pointing_resolver.reset()
         while self.__selection_timer.is_running():
             self.__selection_timer.count()
             image = self.get_image()
-            bbox = self.point_out(image, object_id)
-            cv2.putText(image, "Point out the object...", (20, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 2)
-            if bbox is not None:
+            bbox, confidence = self.point_out(image, object_id)
+            if bbox is not None and confidence >= POINTING_CONFIDENCE:
                 object_bbox = bbox
-            self.__image_oqueue.put(image)
+            self.emit_packet(make_packet(image, [bbox] if bbox is not None else [], "Point out the object..."))
         self.__selection_timer.reset()
         return object_bbox
 
@@ -262,8 +386,7 @@ class FusionEngine:
         while self.__selection_timer.is_running():
             self.__selection_timer.count()
             image = self.get_image()
-            cv2.putText(image, message, (20, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 2)
-            self.__image_oqueue.put(image)
+            self.emit_packet(make_packet(image, message=message))
         self.__selection_timer.reset()
 
 
@@ -5,10 +5,21 @@ from utils.logger import Logger
 import os
 import psutil
 
+PARTIAL_INTERVAL = 0.5
+# Seconds of new audio between two partial transcripts of the
+# utterance that is still being spoken.
+
 
 class SpeechEngine:
     def __init__(self, queue: Queue):
-        self.sr = SpeechRecognizer()
+        from config import config
+        # partial transcripts for prefetching come from the online decoder, which extends them chunk by chunk
+        # instead of decoding the whole utterance again
+        self.__streaming = config.SO == 1 or config.PH == 1
+        if self.__streaming:
+            self.sr = StreamingSpeechRecognizer()
+        else:
+            self.sr = SpeechRecognizer()
         process = psutil.Process(os.getpid())
         start = process.memory_info()[0]
         usage = process.memory_info()[0] - start
@@ -16,9 +27,80 @@ class SpeechEngine:
         self.__queue = queue
         self.__logger_speech = Logger("speech")
         self.__logger_text = Logger("text")
+        self.__prefetched = set()
+
+    def publish_command(self, te, text):
+        sentiment = te.get_sentiment(text)
+        if sentiment:
+            self.__queue.put(sentiment)
+            print("[Speech] Detected speech: %s [%s]" % (text, sentiment["operation"]))
+        else:
+            print("[Speech] Detected speech: %s [Invalid Command]" % text)
+
+    def start_streaming_recognition(self):
+        """ Decodes every chunk as it is read and delivers the command as
+            soon as Kaldi detects the endpoint of the utterance """
+        from text_classification import TextClassificationEngine
+        from config import config
+        te = TextClassificationEngine()
+        p, stream = open_audio_stream()
+        print("[Speech] Listening (streaming)...")
+
+        audio2send = []
+        prev_audio = deque(maxlen=int(PREV_AUDIO * REL) + 1)
+        partial_chunks = int(PARTIAL_INTERVAL * REL)
+        started = False
+
+        while True:
+            try:
+                cur_data = stream.read(CHUNK)
+                if not started:
+                    if math.sqrt(abs(audioop.avg(cur_data, 4))) <= THRESHOLD:
+                        prev_audio.append(cur_data)
+                        continue
+                    started = True
+                    self.__queue.put({"operation": "SpeechStarted"})
+                    self.sr.start()
+                    for chunk in prev_audio:
+                        self.sr.accept(chunk)
+                    audio2send = list(prev_audio)
+                audio2send.append(cur_data)
+                if not self.sr.accept(cur_data):
+                    if len(audio2send) % partial_chunks == 0:
+                        text = self.sr.partial()
+                        print("[Speech] Partial: %s" % text)
+                        object_id = te.find_object_mention(text)
+                        if config.PH == 1 and object_id is not None and object_id not in self.__prefetched:
+                            self.__prefetched.add(object_id)
+                            self.__queue.put({"operation": "Prefetch", "object_id": object_id})
+                    continue
+                # Endpoint detected, flush the decoder and deliver.
+                timestamp = self.__logger_speech.start()
+                text = self.sr.finish()
+                self.__logger_speech.checkpoint(text)
+                self.sr.save_speech_log(audio2send, p, timestamp)
+                self.__logger_text.start()
+                self.publish_command(te, text)
+                # Reset all
+                self.__prefetched = set()
+                started = False
+                prev_audio = deque(maxlen=int(PREV_AUDIO * REL) + 1)
+                audio2send = []
+            except KeyboardInterrupt:
+                self.__logger_text.save()
+                self.__logger_text.close()
+                self.__logger_speech.save()
+                self.__logger_speech.close()
+                break
+
+        stream.stop_stream()
+        stream.close()
+        p.terminate()
 
     def start_recognition(self):
         from text_classification import TextClassificationEngine
+        if self.__streaming:
+            return self.start_streaming_recognition()
         te = TextClassificationEngine()
         p, stream = open_audio_stream()
         print("[Speech] Listening...")
@@ -35,25 +117,19 @@ class SpeechEngine:
                 if sum([x > THRESHOLD for x in slid_win]) > 0:
                     if not started:
                         started = True
+                        # let the fusion engine start detecting while the command is being spoken
+                        self.__queue.put({"operation": "SpeechStarted"})
                     audio2send.append(cur_data)
                 elif started is True:
                     # The limit was reached, finish capture and deliver.
-                    filename = self.sr.save_speech(list(prev_audio) + audio2send, p)
                     timestamp = self.__logger_speech.start()
-                    text = self.sr.recognize_speech()
+                    text = self.sr.recognize_pcm(list(prev_audio) + audio2send)
                     self.__logger_speech.checkpoint(text)
                     # print(text)
                     self.sr.save_speech_log(list(prev_audio) + audio2send, p, timestamp)
                     self.__logger_text.start()
-                    sentiment = te.get_sentiment(text)
+                    self.publish_command(te, text)
                     # self.__logger_text.checkpoint(text)
-                    if sentiment:
-                        self.__queue.put(sentiment)
-                        print("[Speech] Detected speech: %s [%s]" % (text, sentiment["operation"]))
-                    else:
-                        print("[Speech] Detected speech: %s [Invalid Command]" % text)
-                    # Remove temp file. Comment line to review.
-                    os.remove(filename)
                     # Reset all
                     started = False
                     slid_win = deque(maxlen=int(SILENCE_LIMIT * REL) + 1)
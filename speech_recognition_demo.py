@@ -40,6 +40,7 @@ class SpeechEngine:
             if os.path.exists(destination):
                 os.remove(destination)
             shutil.copyfile(source, destination)
+            self.__queue.put({"operation": "SpeechStarted"})
             self.__logger_speech.start()
             text = self.sr.recognize_speech()
             text = text.strip().lower()
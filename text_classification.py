@@ -1,4 +1,3 @@
-import tensorflow as tf
 import pandas as pd
 from nltk.tokenize.treebank import TreebankWordDetokenizer
 from nltk.tokenize import word_tokenize
@@ -7,11 +6,15 @@ import os
 import psutil
 from pickle import load
 
+import numpy_models
+from tokenizer import Tokenizer, pad_sequences
+
 
 class TextClassificationEngine:
     def __init__(self):
         from config import config
         self.H = config.TC
+        self.__use_numpy = config.NM == 1
         process = psutil.Process(os.getpid())
         self.__max_words = 50000
         # Max number of words in each complaint.
@@ -69,7 +72,11 @@ class TextClassificationEngine:
         self.__dataset_path = "/home/darshanakg/Projects/SensorFusion/zamia/data/dataset.txt"
         self.__tokenizer = self.__init_tokenizer()
         start = process.memory_info()[0]
-        if self.H == 1:
+        if self.H == 1 and self.__use_numpy:
+            # NumPy runtime of the exported model, TensorFlow is never imported
+            self.__model = numpy_models.load_model("data/models/text_classification_lstm.npz")
+        elif self.H == 1:
+            import tensorflow as tf
             # Initializing the model
             config = tf.ConfigProto(intra_op_parallelism_threads=4,
                                     inter_op_parallelism_threads=4,
@@ -88,8 +95,12 @@ class TextClassificationEngine:
         sentences = df['sentence'].values
         filtered_sentences = self.filter_stopwords(sentences)
         detokenized_sentences = self.detokenize(filtered_sentences)
-        tokenizer = tf.keras.preprocessing.text.Tokenizer(self.__max_words, filters='!"#$%&()*+,-./:;<=>?@[\]^_`{|}~',
-                                                          lower=True)
+        if self.__use_numpy:
+            tokenizer = Tokenizer(self.__max_words, filters='!"#$%&()*+,-./:;<=>?@[\]^_`{|}~', lower=True)
+        else:
+            import tensorflow as tf
+            tokenizer = tf.keras.preprocessing.text.Tokenizer(self.__max_words,
+                                                              filters='!"#$%&()*+,-./:;<=>?@[\]^_`{|}~', lower=True)
         tokenizer.fit_on_texts(detokenized_sentences)
         word_index = tokenizer.word_index
         print('Found %s unique tokens.' % len(word_index))
@@ -117,7 +128,11 @@ class TextClassificationEngine:
         new_command = [command]
         filtered_commands = self.filter_stopwords(new_command)
         seq = self.__tokenizer.texts_to_sequences(filtered_commands)
-        padded = tf.keras.preprocessing.sequence.pad_sequences(seq, maxlen=self.__max_seq_length)
+        if self.__use_numpy:
+            padded = pad_sequences(seq, maxlen=self.__max_seq_length)
+        else:
+            import tensorflow as tf
+            padded = tf.keras.preprocessing.sequence.pad_sequences(seq, maxlen=self.__max_seq_length)
         pred_index = np.argmax(self.__model.predict(padded))
         obj = self.__find_command(seq)
         if pred_index == 2 or obj["object_id"] == -1:
@@ -136,6 +151,15 @@ class TextClassificationEngine:
         obj["operation"] = self.__labels[pred_index]
         return obj
 
+    def find_object_mention(self, text):
+        """
+        Returns the object id of the first object name in a (partial) transcript, or None.
+        """
+        for token in text.lower().split():
+            if token in self.__name_dictionary:
+                return self.__name_dictionary[token]["object_id"]
+        return None
+
     def __find_command(self, tokens):
         _pointing = False
         for token in tokens[0]:
@@ -0,0 +1,60 @@
+"""
+The parts of the Keras text preprocessing that TextClassificationEngine uses, without importing TensorFlow.
+They produce the same sequences as tf.keras.preprocessing.text.Tokenizer and sequence.pad_sequences.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+
+class Tokenizer:
+    def __init__(self, num_words=None, filters=FILTERS, lower=True, split=" "):
+        self.num_words = num_words
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.word_index = {}
+
+    def text_to_word_sequence(self, text):
+        if self.lower:
+            text = text.lower()
+        text = text.translate(str.maketrans({c: self.split for c in self.filters}))
+        return [word for word in text.split(self.split) if word]
+
+    def fit_on_texts(self, texts):
+        counts = OrderedDict()
+        for text in texts:
+            for word in self.text_to_word_sequence(text):
+                counts[word] = counts.get(word, 0) + 1
+        # most frequent first, ties in order of appearance, indices start at 1
+        ordered = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        self.word_index = {word: index + 1 for index, (word, _) in enumerate(ordered)}
+
+    def texts_to_sequences(self, texts):
+        """
+        texts are strings or lists of tokens, tokens are only lowercased.
+        """
+        sequences = []
+        for text in texts:
+            if isinstance(text, list):
+                words = [word.lower() for word in text] if self.lower else text
+            else:
+                words = self.text_to_word_sequence(text)
+            indices = [self.word_index.get(word) for word in words]
+            sequences.append([index for index in indices
+                              if index is not None and (not self.num_words or index < self.num_words)])
+        return sequences
+
+
+def pad_sequences(sequences, maxlen):
+    """
+    Zero pads and truncates at the start of the sequences, the Keras defaults.
+    """
+    padded = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for row, sequence in enumerate(sequences):
+        sequence = sequence[-maxlen:]
+        if len(sequence):
+            padded[row, -len(sequence):] = sequence
+    return padded
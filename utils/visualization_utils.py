@@ -24,6 +24,7 @@ import collections
 # Set headless-friendly backend.
 import matplotlib; matplotlib.use('Agg')  # pylint: disable=multiple-statements
 import matplotlib.pyplot as plt  # pylint: disable=g-import-not-at-top
+import cv2
 import numpy as np
 import PIL.Image as Image
 import PIL.ImageColor as ImageColor
@@ -37,6 +38,12 @@ from utils import shape_utils
 
 _TITLE_LEFT_MARGIN = 10
 _TITLE_TOP_MARGIN = 10
+# Hershey font used by the OpenCV backend, scaled to about the height of the
+# 24 point font of the PIL backend.
+_CV2_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_CV2_FONT_SCALE = 0.8
+_CV2_FONT_THICKNESS = 1
+_RGB_CACHE = {}
 STANDARD_COLORS = [
     'AliceBlue', 'Chartreuse', 'Aqua', 'Aquamarine', 'Azure', 'Beige', 'Bisque',
     'BlanchedAlmond', 'BlueViolet', 'BurlyWood', 'CadetBlue', 'AntiqueWhite',
@@ -681,6 +688,87 @@ def draw_mask_on_image_array(image, mask, color='red', alpha=0.4):
   np.copyto(image, np.array(pil_image.convert('RGB')))
 
 
+def _group_boxes(boxes,
+                 classes,
+                 scores,
+                 category_index,
+                 instance_masks,
+                 instance_boundaries,
+                 keypoints,
+                 track_ids,
+                 max_boxes_to_draw,
+                 min_score_thresh,
+                 agnostic_mode,
+                 groundtruth_box_visualization_color,
+                 skip_scores,
+                 skip_labels,
+                 skip_track_ids):
+  """Groups the detections to draw by box location.
+
+  Shared by visualize_boxes_and_labels_on_image_array and its OpenCV backend,
+  see there for the arguments.
+
+  Returns:
+    (box_to_display_str_map, box_to_color_map, box_to_instance_masks_map,
+     box_to_instance_boundaries_map, box_to_keypoints_map)
+  """
+  # Create a display string (and color) for every box location, group any boxes
+  # that correspond to the same location.
+  box_to_display_str_map = collections.defaultdict(list)
+  box_to_color_map = collections.defaultdict(str)
+  box_to_instance_masks_map = {}
+  box_to_instance_boundaries_map = {}
+  box_to_keypoints_map = collections.defaultdict(list)
+  box_to_track_ids_map = {}
+  if not max_boxes_to_draw:
+    max_boxes_to_draw = boxes.shape[0]
+  for i in range(min(max_boxes_to_draw, boxes.shape[0])):
+    if scores is None or scores[i] > min_score_thresh:
+      box = tuple(boxes[i].tolist())
+      if instance_masks is not None:
+        box_to_instance_masks_map[box] = instance_masks[i]
+      if instance_boundaries is not None:
+        box_to_instance_boundaries_map[box] = instance_boundaries[i]
+      if keypoints is not None:
+        box_to_keypoints_map[box].extend(keypoints[i])
+      if track_ids is not None:
+        box_to_track_ids_map[box] = track_ids[i]
+      if scores is None:
+        box_to_color_map[box] = groundtruth_box_visualization_color
+      else:
+        display_str = ''
+        if not skip_labels:
+          if not agnostic_mode:
+            if classes[i] in category_index.keys():
+              class_name = category_index[classes[i]]['name']
+            else:
+              class_name = 'N/A'
+            display_str = str(class_name)
+        if not skip_scores:
+          if not display_str:
+            display_str = '{}%'.format(int(100*scores[i]))
+          else:
+            display_str = '{}: {}%'.format(display_str, int(100*scores[i]))
+        if not skip_track_ids and track_ids is not None:
+          if not display_str:
+            display_str = 'ID {}'.format(track_ids[i])
+          else:
+            display_str = '{}: ID {}'.format(display_str, track_ids[i])
+        box_to_display_str_map[box].append(display_str)
+        if agnostic_mode:
+          box_to_color_map[box] = 'DarkOrange'
+        elif track_ids is not None:
+          prime_multipler = _get_multiplier_for_color_randomness()
+          box_to_color_map[box] = STANDARD_COLORS[
+              (prime_multipler * track_ids[i]) % len(STANDARD_COLORS)]
+        else:
+          box_to_color_map[box] = STANDARD_COLORS[
+              classes[i] % len(STANDARD_COLORS)]
+
+  return (box_to_display_str_map, box_to_color_map, box_to_instance_masks_map,
+          box_to_instance_boundaries_map, box_to_keypoints_map)
+
+
 def visualize_boxes_and_labels_on_image_array(
     image,
     boxes,
@@ -744,58 +832,12 @@ def visualize_boxes_and_labels_on_image_array(
   Returns:
     uint8 numpy array with shape (img_height, img_width, 3) with overlaid boxes.
   """
-  # Create a display string (and color) for every box location, group any boxes
-  # that correspond to the same location.
-  box_to_display_str_map = collections.defaultdict(list)
-  box_to_color_map = collections.defaultdict(str)
-  box_to_instance_masks_map = {}
-  box_to_instance_boundaries_map = {}
-  box_to_keypoints_map = collections.defaultdict(list)
-  box_to_track_ids_map = {}
-  if not max_boxes_to_draw:
-    max_boxes_to_draw = boxes.shape[0]
-  for i in range(min(max_boxes_to_draw, boxes.shape[0])):
-    if scores is None or scores[i] > min_score_thresh:
-      box = tuple(boxes[i].tolist())
-      if instance_masks is not None:
-        box_to_instance_masks_map[box] = instance_masks[i]
-      if instance_boundaries is not None:
-        box_to_instance_boundaries_map[box] = instance_boundaries[i]
-      if keypoints is not None:
-        box_to_keypoints_map[box].extend(keypoints[i])
-      if track_ids is not None:
-        box_to_track_ids_map[box] = track_ids[i]
-      if scores is None:
-        box_to_color_map[box] = groundtruth_box_visualization_color
-      else:
-        display_str = ''
-        if not skip_labels:
-          if not agnostic_mode:
-            if classes[i] in category_index.keys():
-              class_name = category_index[classes[i]]['name']
-            else:
-              class_name = 'N/A'
-            display_str = str(class_name)
-        if not skip_scores:
-          if not display_str:
-            display_str = '{}%'.format(int(100*scores[i]))
-          else:
-            display_str = '{}: {}%'.format(display_str, int(100*scores[i]))
-        if not skip_track_ids and track_ids is not None:
-          if not display_str:
-            display_str = 'ID {}'.format(track_ids[i])
-          else:
-            display_str = '{}: ID {}'.format(display_str, track_ids[i])
-        box_to_display_str_map[box].append(display_str)
-        if agnostic_mode:
-          box_to_color_map[box] = 'DarkOrange'
-        elif track_ids is not None:
-          prime_multipler = _get_multiplier_for_color_randomness()
-          box_to_color_map[box] = STANDARD_COLORS[
-              (prime_multipler * track_ids[i]) % len(STANDARD_COLORS)]
-        else:
-          box_to_color_map[box] = STANDARD_COLORS[
-              classes[i] % len(STANDARD_COLORS)]
+  (box_to_display_str_map, box_to_color_map, box_to_instance_masks_map,
+   box_to_instance_boundaries_map, box_to_keypoints_map) = _group_boxes(
+       boxes, classes, scores, category_index, instance_masks,
+       instance_boundaries, keypoints, track_ids, max_boxes_to_draw,
+       min_score_thresh, agnostic_mode, groundtruth_box_visualization_color,
+       skip_scores, skip_labels, skip_track_ids)
 
   # Draw all boxes onto image.
   for box, color in box_to_color_map.items():
@@ -834,6 +876,206 @@ def visualize_boxes_and_labels_on_image_array(
   return image
 
 
+def _get_rgb(color):
+  """Returns the RGB tuple of a PIL color name, looked up once per name."""
+  if color not in _RGB_CACHE:
+    _RGB_CACHE[color] = ImageColor.getrgb(color)[:3]
+  return _RGB_CACHE[color]
+
+
+def draw_bounding_box_on_image_array_cv2(image,
+                                         ymin,
+                                         xmin,
+                                         ymax,
+                                         xmax,
+                                         color='red',
+                                         thickness=4,
+                                         display_str_list=(),
+                                         use_normalized_coordinates=True):
+  """Adds a bounding box to an image (numpy array) with OpenCV primitives.
+
+  Draws in place on the uint8 array with the same layout as
+  draw_bounding_box_on_image_array, without the round trip through PIL.
+
+  Args:
+    image: a uint8 numpy array with shape [height, width, 3].
+    ymin: ymin of bounding box.
+    xmin: xmin of bounding box.
+    ymax: ymax of bounding box.
+    xmax: xmax of bounding box.
+    color: color to draw bounding box. Default is red.
+    thickness: line thickness. Default value is 4.
+    display_str_list: list of strings to display in box
+                      (each to be shown on its own line).
+    use_normalized_coordinates: If True (default), treat coordinates
+      ymin, xmin, ymax, xmax as relative to the image.  Otherwise treat
+      coordinates as absolute.
+  """
+  im_height, im_width = image.shape[:2]
+  if use_normalized_coordinates:
+    (left, right, top, bottom) = (xmin * im_width, xmax * im_width,
+                                  ymin * im_height, ymax * im_height)
+  else:
+    (left, right, top, bottom) = (xmin, xmax, ymin, ymax)
+  rgb = _get_rgb(color)
+  corners = np.array([[left, top], [left, bottom], [right, bottom],
+                      [right, top]])
+  cv2.polylines(image, [np.round(corners).astype(np.int32)], True, rgb,
+                int(thickness))
+
+  # Same stacking as draw_bounding_box_on_image: above the box unless the
+  # strings would leave the image, in which case below it.
+  text_sizes = [cv2.getTextSize(ds, _CV2_FONT, _CV2_FONT_SCALE,
+                                _CV2_FONT_THICKNESS)
+                for ds in display_str_list]
+  display_str_heights = [height + baseline
+                         for (_, height), baseline in text_sizes]
+  total_display_str_height = (1 + 2 * 0.05) * sum(display_str_heights)
+
+  if top > total_display_str_height:
+    text_bottom = top
+  else:
+    text_bottom = bottom + total_display_str_height
+  for display_str, ((text_width, glyph_height), baseline) in zip(
+      display_str_list[::-1], text_sizes[::-1]):
+    text_height = glyph_height + baseline
+    margin = np.ceil(0.05 * text_height)
+    cv2.rectangle(image,
+                  (int(left), int(text_bottom - text_height - 2 * margin)),
+                  (int(left + text_width), int(text_bottom)), rgb, -1)
+    cv2.putText(image, display_str,
+                (int(left + margin),
+                 int(text_bottom - margin - baseline)),
+                _CV2_FONT, _CV2_FONT_SCALE, (0, 0, 0), _CV2_FONT_THICKNESS,
+                cv2.LINE_AA)
+    text_bottom -= text_height - 2 * margin
+
+
+def draw_keypoints_on_image_array_cv2(image,
+                                      keypoints,
+                                      color='red',
+                                      radius=2,
+                                      use_normalized_coordinates=True):
+  """Draws keypoints on an image (numpy array) with OpenCV primitives.
+
+  Args:
+    image: a uint8 numpy array with shape [height, width, 3].
+    keypoints: a numpy array with shape [num_keypoints, 2].
+    color: color to draw the keypoints with. Default is red.
+    radius: keypoint radius. Default value is 2.
+    use_normalized_coordinates: if True (default), treat keypoint values as
+      relative to the image.  Otherwise treat them as absolute.
+  """
+  im_height, im_width = image.shape[:2]
+  keypoints = np.asarray(keypoints, dtype=np.float64)
+  if use_normalized_coordinates:
+    keypoints = keypoints * [im_height, im_width]
+  rgb = _get_rgb(color)
+  for keypoint_y, keypoint_x in np.round(keypoints).astype(np.int32):
+    cv2.circle(image, (int(keypoint_x), int(keypoint_y)),
+               int(round(radius)), rgb, -1)
+
+
+def draw_mask_on_image_array_cv2(image, mask, color='red', alpha=0.4):
+  """Draws mask on an image with a vectorized blend of the masked pixels.
+
+  Args:
+    image: uint8 numpy array with shape (img_height, img_height, 3)
+    mask: a uint8 numpy array of shape (img_height, img_height) with
+      values between either 0 or 1.
+    color: color to draw the keypoints with. Default is red.
+    alpha: transparency value between 0 and 1. (default: 0.4)
+
+  Raises:
+    ValueError: On incorrect data type for image or masks.
+  """
+  if image.dtype != np.uint8:
+    raise ValueError('`image` not of type np.uint8')
+  if mask.dtype != np.uint8:
+    raise ValueError('`mask` not of type np.uint8')
+  if np.any(mask > 1):
+    raise ValueError('`mask` elements should be in [0, 1]')
+  if image.shape[:2] != mask.shape:
+    raise ValueError('The image has spatial dimensions %s but the mask has '
+                     'dimensions %s' % (image.shape[:2], mask.shape))
+  selected = mask.astype(bool)
+  pixels = image[selected].astype(np.float32)
+  pixels += alpha * (np.array(_get_rgb(color), dtype=np.float32) - pixels)
+  image[selected] = np.round(pixels).astype(np.uint8)
+
+
+def visualize_boxes_and_labels_on_image_array_cv2(
+    image,
+    boxes,
+    classes,
+    scores,
+    category_index,
+    instance_masks=None,
+    instance_boundaries=None,
+    keypoints=None,
+    track_ids=None,
+    use_normalized_coordinates=False,
+    max_boxes_to_draw=20,
+    min_score_thresh=.5,
+    agnostic_mode=False,
+    line_thickness=4,
+    groundtruth_box_visualization_color='black',
+    skip_scores=False,
+    skip_labels=False,
+    skip_track_ids=False):
+  """OpenCV backend of visualize_boxes_and_labels_on_image_array.
+
+  Takes the same arguments and groups, colors and labels the boxes the same
+  way, but draws directly on the uint8 array with OpenCV and NumPy instead of
+  converting the image to PIL and back for every box, mask and keypoint set.
+  Labels are rendered with a Hershey font rather than the PIL font.
+
+  Returns:
+    uint8 numpy array with shape (img_height, img_width, 3) with overlaid boxes.
+  """
+  (box_to_display_str_map, box_to_color_map, box_to_instance_masks_map,
+   box_to_instance_boundaries_map, box_to_keypoints_map) = _group_boxes(
+       boxes, classes, scores, category_index, instance_masks,
+       instance_boundaries, keypoints, track_ids, max_boxes_to_draw,
+       min_score_thresh, agnostic_mode, groundtruth_box_visualization_color,
+       skip_scores, skip_labels, skip_track_ids)
+
+  for box, color in box_to_color_map.items():
+    ymin, xmin, ymax, xmax = box
+    if instance_masks is not None:
+      draw_mask_on_image_array_cv2(
+          image,
+          box_to_instance_masks_map[box],
+          color=color
+      )
+    if instance_boundaries is not None:
+      draw_mask_on_image_array_cv2(
+          image,
+          box_to_instance_boundaries_map[box],
+          color='red',
+          alpha=1.0
+      )
+    draw_bounding_box_on_image_array_cv2(
+        image,
+        ymin,
+        xmin,
+        ymax,
+        xmax,
+        color=color,
+        thickness=line_thickness,
+        display_str_list=box_to_display_str_map[box],
+        use_normalized_coordinates=use_normalized_coordinates)
+    if keypoints is not None:
+      draw_keypoints_on_image_array_cv2(
+          image,
+          box_to_keypoints_map[box],
+          color=color,
+          radius=line_thickness / 2,
+          use_normalized_coordinates=use_normalized_coordinates)
+
+  return image
+
+
 def add_cdf_image_summary(values, name):
   """Adds a tf.summary.image for a CDF plot of the values.
 
@@ -1,24 +1,87 @@
 import cv2
 import time
 
+from config import config
+
+# viewer commands, the keys of the OpenCV window and the /command/<key> requests of the MJPEG server
+COMMANDS = {
+    "a": {"operation": "Describe", "object_id": 3, "multiple": False, "pointing": False},
+    "b": {"operation": "Locate", "object_id": 3, "multiple": True, "pointing": False},
+    "c": {"operation": "Locate", "object_id": 3, "multiple": False, "pointing": False},
+}
+
+# "0.0.0.0" serves the preview, and its unauthenticated commands, to the whole network
+MJPEG_HOST = "127.0.0.1"
+MJPEG_PORT = 8080
+MJPEG_FPS = 15
+MJPEG_QUALITY = 80
+
+RECORDING_DIRECTORY = "recordings"
+
+
+def start_recorder():
+    """
+    Returns a started SessionRecorder if recording is enabled, else None.
+    """
+    if config.RC != 1:
+        return None
+    from recorder import SessionRecorder
+    recorder = SessionRecorder(RECORDING_DIRECTORY)
+    recorder.start()
+    return recorder
+
+
+def stop_recorder(recorder):
+    if recorder is not None:
+        recorder.stop()
+        print("Recorder: %s" % recorder.report())
+
+
 def stream(fusion_engine):
+    if config.MJ == 1:
+        serve(fusion_engine)
+        return
+
+    renderer = fusion_engine.get_renderer()
+    recorder = start_recorder()
 
     while True:
-        frame = fusion_engine.image_dequeue()
+        frame = renderer.render(fusion_engine.image_dequeue())
+        if recorder is not None:
+            recorder.write(frame)
         cv2.imshow('Object detector', frame)
         # Press 'q' to quit
         key = cv2.waitKey(1) & 0xFF
         if key == ord('q'):
             break
-        elif key == ord('a'):
-            fusion_engine.enqueue_command({"operation": "Describe", "object_id": 3, "multiple": False, "pointing": False})
-        elif key == ord('b'):
-            fusion_engine.enqueue_command({"operation": "Locate", "object_id": 3, "multiple": True, "pointing": False})
-        elif key == ord('c'):
-            fusion_engine.enqueue_command({"operation": "Locate", "object_id": 3, "multiple": False, "pointing": False})
+        elif chr(key) in COMMANDS:
+            fusion_engine.enqueue_command(dict(COMMANDS[chr(key)]))
 
         elif key == ord('s'):
             cv2.imwrite("%d.png" % time.time(), frame)
         # Clean up
+    stop_recorder(recorder)
     cv2.destroyAllWindows()
 
+
+def serve(fusion_engine):
+    """
+    Headless alternative of stream, annotated frames are served as MJPEG on http://MJPEG_HOST:MJPEG_PORT/.
+    """
+    from mjpeg_server import MJPEGServer
+    renderer = fusion_engine.get_renderer()
+    server = MJPEGServer(host=MJPEG_HOST, port=MJPEG_PORT, fps=MJPEG_FPS, quality=MJPEG_QUALITY,
+                         on_command=lambda key: fusion_engine.enqueue_command(dict(COMMANDS[key])),
+                         commands=sorted(COMMANDS))
+    server.start()
+    recorder = start_recorder()
+    print("Serving the object detector on http://%s:%d/" % (MJPEG_HOST, MJPEG_PORT))
+    try:
+        while True:
+            frame = renderer.render(fusion_engine.image_dequeue())
+            server.publish(frame)
+            if recorder is not None:
+                recorder.write(frame)
+    finally:
+        stop_recorder(recorder)
+        server.stop()
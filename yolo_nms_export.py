@@ -0,0 +1,141 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+import core.utils as utils
+from graph_optimizer import read_graph_def, get_feed, INPUT_SIZE
+from object_detection_demo import YOLO_TENSOR_NAMES, YOLO_NMS_TENSOR_NAMES
+
+NUM_CLASSES = 10
+MAX_OUTPUT_SIZE = 100
+
+
+def add_postprocess(graph, num_classes, input_size, max_output_size):
+    """
+    Adds the box decoding, letterbox inversion, score thresholding and per-class nms of
+    core.utils.postprocess_boxes / core.utils.nms on top of the yolo prediction tensors.
+    The result is a (N, 6) tensor of [x_min, y_min, x_max, y_max, score, cls_id] rows.
+    """
+    pred_sbbox, pred_mbbox, pred_lbbox = [graph.get_tensor_by_name(n) for n in YOLO_TENSOR_NAMES[1:]]
+    with graph.as_default(), tf.name_scope("postprocess"):
+        org_size = tf.placeholder(tf.float32, shape=[2], name="org_size")
+        score_threshold = tf.placeholder_with_default(0.3, shape=[], name="score_threshold")
+        iou_threshold = tf.placeholder_with_default(0.45, shape=[], name="iou_threshold")
+
+        pred_bbox = tf.concat([tf.reshape(pred_sbbox, (-1, 5 + num_classes)),
+                               tf.reshape(pred_mbbox, (-1, 5 + num_classes)),
+                               tf.reshape(pred_lbbox, (-1, 5 + num_classes))], axis=0)
+        pred_xywh = pred_bbox[:, 0:4]
+        pred_conf = pred_bbox[:, 4]
+        pred_prob = pred_bbox[:, 5:]
+
+        # (1) (x, y, w, h) --> (xmin, ymin, xmax, ymax) in the original image
+        org_h, org_w = org_size[0], org_size[1]
+        resize_ratio = tf.minimum(input_size / org_w, input_size / org_h)
+        dw = (input_size - resize_ratio * org_w) / 2
+        dh = (input_size - resize_ratio * org_h) / 2
+        x_min = (pred_xywh[:, 0] - pred_xywh[:, 2] * 0.5 - dw) / resize_ratio
+        y_min = (pred_xywh[:, 1] - pred_xywh[:, 3] * 0.5 - dh) / resize_ratio
+        x_max = (pred_xywh[:, 0] + pred_xywh[:, 2] * 0.5 - dw) / resize_ratio
+        y_max = (pred_xywh[:, 1] + pred_xywh[:, 3] * 0.5 - dh) / resize_ratio
+
+        # (2) clip the boxes to the image and drop the empty ones
+        x_min = tf.maximum(x_min, 0.)
+        y_min = tf.maximum(y_min, 0.)
+        x_max = tf.minimum(x_max, org_w - 1)
+        y_max = tf.minimum(y_max, org_h - 1)
+        valid_mask = tf.logical_and(x_max > x_min, y_max > y_min)
+
+        # (3) discard the boxes with low scores
+        classes = tf.argmax(pred_prob, axis=-1)
+        scores = pred_conf * tf.reduce_max(pred_prob, axis=-1)
+        mask = tf.logical_and(valid_mask, scores > score_threshold)
+
+        coors = tf.boolean_mask(tf.stack([x_min, y_min, x_max, y_max], axis=-1), mask)
+        scores = tf.boolean_mask(scores, mask)
+        classes = tf.cast(tf.boolean_mask(classes, mask), tf.float32)
+
+        # (4) per-class nms in one pass, boxes of different classes are shifted apart so they never overlap
+        offsets = classes[:, tf.newaxis] * (tf.maximum(org_w, org_h) + 1)
+        keep = tf.image.non_max_suppression(coors + offsets, scores, max_output_size, iou_threshold)
+        return tf.concat([tf.gather(coors, keep),
+                          tf.gather(scores, keep)[:, tf.newaxis],
+                          tf.gather(classes, keep)[:, tf.newaxis]], axis=-1, name="bboxes")
+
+
+def export(source, output_path):
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(read_graph_def(source), name='')
+    bboxes = add_postprocess(graph, NUM_CLASSES, INPUT_SIZE, MAX_OUTPUT_SIZE)
+    output_graph_def = tf.graph_util.extract_sub_graph(graph.as_graph_def(), [bboxes.op.name])
+    with tf.gfile.GFile(output_path, 'wb') as fid:
+        fid.write(output_graph_def.SerializeToString())
+
+
+def benchmark(source, output_path, image, runs):
+    """
+    Compares the current path (three prediction tensors copied out, decoding and nms in python) with the
+    exported graph, on the same frame.
+    """
+    feed = get_feed("yolo", image)
+
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(read_graph_def(source), name='')
+    tensors = [graph.get_tensor_by_name(n) for n in YOLO_TENSOR_NAMES]
+    run_times, post_times = [], []
+    with tf.Session(graph=graph) as sess:
+        sess.run(tensors[1:], feed_dict={tensors[0]: feed})
+        for _ in range(runs):
+            start = time.time()
+            preds = sess.run(tensors[1:], feed_dict={tensors[0]: feed})
+            run_times.append(time.time() - start)
+            start = time.time()
+            pred_bbox = np.concatenate([np.reshape(p, (-1, 5 + NUM_CLASSES)) for p in preds], axis=0)
+            bboxes = utils.postprocess_boxes(pred_bbox, image.shape[:2], INPUT_SIZE, 0.3)
+            utils.nms(bboxes, 0.45, method='nms')
+            post_times.append(time.time() - start)
+    copied = sum(p.nbytes for p in preds)
+
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(read_graph_def(output_path), name='')
+    tensors = [graph.get_tensor_by_name(n) for n in YOLO_NMS_TENSOR_NAMES]
+    feed_dict = {tensors[0]: feed, tensors[1]: image.shape[:2]}
+    fused_times = []
+    with tf.Session(graph=graph) as sess:
+        sess.run(tensors[2], feed_dict=feed_dict)
+        for _ in range(runs):
+            start = time.time()
+            bboxes = sess.run(tensors[2], feed_dict=feed_dict)
+            fused_times.append(time.time() - start)
+
+    print("[YOLO Export]")
+    print("%-28s %15s %15s" % ("", "python nms", "in-graph nms"))
+    print("%-28s %15d %15d" % ("bytes copied per frame", copied, bboxes.nbytes))
+    print("%-28s %15.2f %15s" % ("sess.run (ms)", np.mean(run_times) * 1000, "-"))
+    print("%-28s %15.2f %15s" % ("python postprocess (ms)", np.mean(post_times) * 1000, "-"))
+    print("%-28s %15.2f %15.2f" % ("total (ms)",
+                                   (np.mean(run_times) + np.mean(post_times)) * 1000,
+                                   np.mean(fused_times) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports the yolo graph with decoding and nms inside the graph")
+    parser.add_argument("--source", default=os.path.join('data', 'models', 'yolo_v3.pb'))
+    parser.add_argument("--output", default=os.path.join('data', 'models', 'yolo_v3_nms.pb'))
+    parser.add_argument("--image", default="images/10.jpg")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    export(args.source, args.output)
+    benchmark(args.source, args.output, cv2.imread(args.image), args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,15 +6,20 @@ import audioop
 import math
 import os
 import re
+import threading
 import wave
 from collections import deque
 from time import time
 
 import kaldi
+import numpy as np
 import pyaudio
-from kaldi.asr import NnetLatticeFasterRecognizer
+from kaldi.asr import NnetLatticeFasterOnlineRecognizer, NnetLatticeFasterRecognizer
 from kaldi.decoder import LatticeFasterDecoderOptions
-from kaldi.nnet3 import NnetSimpleComputationOptions
+from kaldi.matrix import Matrix, Vector
+from kaldi.nnet3 import NnetSimpleComputationOptions, NnetSimpleLoopedComputationOptions
+from kaldi.online2 import (OnlineEndpointConfig, OnlineNnetFeaturePipeline, OnlineNnetFeaturePipelineConfig,
+                           OnlineNnetFeaturePipelineInfo)
 from kaldi.util.table import SequentialMatrixReader
 
 CHUNK = 1024
@@ -41,6 +46,10 @@ PREV_AUDIO = 0.5
 # prepended. This helps to prevent chopping the begining
 # of the phrase.
 
+IVECTOR_PERIOD = 10
+# Frames between two i-vectors, the ivector-extract-online2 default.
+# The offline recognizer is given the same period.
+
 
 def configure_paths(dir_path, relative_path, delimiter, regex):
     with open(dir_path + relative_path, 'r+') as fp:
@@ -55,6 +64,40 @@ def configure_paths(dir_path, relative_path, delimiter, regex):
             fp.writelines(lines)
 
 
+def initialize_paths(dir_path):
+    regex = "^([A-z0-9-_+]+\/){1,}([A-z0-9]+(\.(conf|mat|stats|dubm|ie|wav|scp))?)$"
+    configure_paths(dir_path + '/aspire_new', '/modified/conf/ivector_extractor.conf', '=', regex)
+    configure_paths(dir_path + '/aspire_new', '/data/test/wav.scp', ' ', regex)
+
+
+def init_features_kaldi(dir_path):
+    # the configs compute-mfcc-feats and ivector-extract-online2 read in recognize_speech
+    feature_opts = OnlineNnetFeaturePipelineConfig()
+    feature_opts.feature_type = "mfcc"
+    feature_opts.mfcc_config = dir_path + "/aspire_new/modified/conf/mfcc_hires.conf"
+    feature_opts.ivector_extraction_config = dir_path + "/aspire_new/modified/conf/ivector_extractor.conf"
+    return OnlineNnetFeaturePipelineInfo.from_config(feature_opts)
+
+
+def int16_vector(data):
+    return Vector(np.frombuffer(data, dtype=np.int16).astype(np.float32))
+
+
+def save_speech_log(data, p, timestamp):
+    """ Saves mic data to temporary WAV file. Returns filename of saved
+        file """
+    filename = os.path.join("/home/darshanakg/utterences", "%d.wav" % timestamp)
+    # writes data to WAV file
+    _data = b''.join(data)
+    wf = wave.open(filename, 'wb')
+    wf.setnchannels(CHANNELS)
+    wf.setsampwidth(p.get_sample_size(FORMAT))
+    wf.setframerate(RATE)
+    wf.writeframes(_data)
+    wf.close()
+    return filename
+
+
 def open_audio_stream():
     p_ref = pyaudio.PyAudio()
     stream = p_ref.open(format=pyaudio.paInt16,
@@ -70,8 +113,10 @@ class SpeechRecognizer:
         kaldi.base.set_verbose_level(0)
         self.__dir_path = os.path.dirname(os.path.realpath(__file__))
         self.__wave_file = "utt1.wav"
+        self.__decode_lock = threading.Lock()
         self.__save_path = self.__dir_path + '/aspire_new/data/test'
-        self.__initialize_path()
+        initialize_paths(self.__dir_path)
+        self.__feature_info = init_features_kaldi(self.__dir_path)
         self.__asr = self.init_asr_kaldi()
 
     def save_speech(self, data, p):
@@ -89,47 +134,58 @@ class SpeechRecognizer:
         return filename
 
     def save_speech_log(self, data, p, timestamp):
-        """ Saves mic data to temporary WAV file. Returns filename of saved
-            file """
-        filename = os.path.join("/home/darshanakg/utterences", "%d.wav" % timestamp)
-        # writes data to WAV file
-        _data = b''.join(data)
-        wf = wave.open(filename, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(p.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(_data)
-        wf.close()
-        return filename
+        return save_speech_log(data, p, timestamp)
 
     def recognize_speech(self):
+        return self.__decode("scp:" + self.__save_path + "/wav.scp", "ark:" + self.__save_path + "/spk2utt")
+
+    def recognize_pcm(self, data):
+        """ Decodes the captured mic chunks in-process, without the WAV
+            file and the Kaldi binaries of recognize_speech """
+        feats, ivectors = self.__extract_features(data)
+        if feats is None:
+            return ""
+        with self.__decode_lock:
+            return self.__asr.decode((feats, ivectors))["text"]
+
+    def __extract_features(self, data):
+        pipeline = OnlineNnetFeaturePipeline(self.__feature_info)
+        pipeline.accept_waveform(RATE, int16_vector(b''.join(data)))
+        pipeline.input_finished()
+        frames = pipeline.num_frames_ready()
+        if frames == 0:
+            return None, None
+        # the i-vector extractor reads the same MFCCs, they are computed once
+        mfcc = pipeline.input_feature()
+        feats = Matrix(frames, mfcc.dim())
+        mfcc.get_frames(list(range(frames)), feats)
+        ivector = pipeline.ivector_feature()
+        ivector_frames = list(range(0, frames, IVECTOR_PERIOD))
+        ivectors = Matrix(len(ivector_frames), ivector.dim())
+        ivector.get_frames(ivector_frames, ivectors)
+        return feats, ivectors
+
+    def __decode(self, wav_rspec, spk2utt_rspec):
         # Define feature pipelines as Kaldi rspecifiers
         feats_rspec = (
-                "ark:compute-mfcc-feats --config=" + self.__dir_path + "/aspire_new/modified/conf/mfcc_hires.conf scp:" + self.__dir_path + "/aspire_new/data/test/wav.scp ark:- |"
-                % {
-                    "path": self.__dir_path + '/aspire_new/modified'
-                }
+                "ark:compute-mfcc-feats --config=" + self.__dir_path + "/aspire_new/modified/conf/mfcc_hires.conf "
+                + wav_rspec + " ark:- |"
         )
         ivectors_rspec = (
-                "ark:compute-mfcc-feats --config=" + self.__dir_path + "/aspire_new/modified/conf/mfcc_hires.conf scp:" + self.__dir_path + "/aspire_new/data/test/wav.scp ark:- | "
-                                                                                                                                            "ivector-extract-online2 --config=" + self.__dir_path + "/aspire_new/modified/conf/ivector_extractor.conf ark:" + self.__dir_path + "/aspire_new/data/test/spk2utt "
-                                                                                                                                                                                                                                                                                "ark:- ark:- |"
-                % {
-                    "path": self.__dir_path + '/aspire_new/modified'
-                }
+                "ark:compute-mfcc-feats --config=" + self.__dir_path + "/aspire_new/modified/conf/mfcc_hires.conf "
+                + wav_rspec + " ark:- | "
+                "ivector-extract-online2 --config=" + self.__dir_path + "/aspire_new/modified/conf/ivector_extractor.conf "
+                + spk2utt_rspec + " ark:- ark:- |"
         )
 
         # Decode wav files
-        with SequentialMatrixReader(feats_rspec) as f, \
+        with self.__decode_lock, \
+                SequentialMatrixReader(feats_rspec) as f, \
                 SequentialMatrixReader(ivectors_rspec) as i:
             for (key, feats), (_, ivectors) in zip(f, i):
                 out = self.__asr.decode((feats, ivectors))
                 return out["text"]
-
-    def __initialize_path(self):
-        regex = "^([A-z0-9-_+]+\/){1,}([A-z0-9]+(\.(conf|mat|stats|dubm|ie|wav|scp))?)$"
-        configure_paths(self.__dir_path + '/aspire_new', '/modified/conf/ivector_extractor.conf', '=', regex)
-        configure_paths(self.__dir_path + '/aspire_new', '/data/test/wav.scp', ' ', regex)
+        return ""
 
     def init_asr_kaldi(self):
         # Construct recognizer
@@ -145,5 +201,72 @@ class SpeechRecognizer:
             self.__dir_path + "/aspire_new/modified/graph/HCLG.fst",
             self.__dir_path + "/aspire_new/modified/lang/words.txt",
             decoder_opts=decoder_opts,
-            decodable_opts=decodable_opts)
+            decodable_opts=decodable_opts,
+            online_ivector_period=IVECTOR_PERIOD)
+        return asr
+
+
+class StreamingSpeechRecognizer:
+    """
+    Decodes the mic audio chunk by chunk with the Kaldi online nnet3 pipeline while the user is still speaking, and
+    detects the end of the utterance with the Kaldi endpointing rules instead of a fixed silence limit.
+    """
+
+    def __init__(self):
+        kaldi.base.set_verbose_level(0)
+        self.__dir_path = os.path.dirname(os.path.realpath(__file__))
+        initialize_paths(self.__dir_path)
+        self.__feature_info = init_features_kaldi(self.__dir_path)
+        self.__asr = self.init_asr_kaldi()
+        self.__pipeline = None
+
+    def start(self):
+        """ Starts decoding a new utterance """
+        self.__pipeline = OnlineNnetFeaturePipeline(self.__feature_info)
+        self.__asr.set_input_pipeline(self.__pipeline)
+        self.__asr.init_decoding()
+
+    def accept(self, chunk):
+        """ Decodes the frames a chunk of stream.read(CHUNK) completes.
+            Returns True once the utterance has reached an endpoint """
+        self.__pipeline.accept_waveform(RATE, int16_vector(chunk))
+        self.__asr.advance_decoding()
+        return self.__asr.endpoint_detected()
+
+    def save_speech_log(self, data, p, timestamp):
+        return save_speech_log(data, p, timestamp)
+
+    def partial(self):
+        """ Returns the best transcript of the audio decoded so far """
+        return self.__asr.get_partial_output()["text"]
+
+    def finish(self):
+        """ Decodes the frames held back for right context and returns the
+            final transcript of the utterance """
+        self.__pipeline.input_finished()
+        self.__asr.advance_decoding()
+        self.__asr.finalize_decoding()
+        self.__pipeline = None
+        return self.__asr.get_output()["text"]
+
+    def init_asr_kaldi(self):
+        decoder_opts = LatticeFasterDecoderOptions()
+        decoder_opts.beam = 13
+        decoder_opts.max_active = 7000
+        decodable_opts = NnetSimpleLoopedComputationOptions()
+        decodable_opts.acoustic_scale = 1.0
+        decodable_opts.frame_subsampling_factor = 3
+        # output frames per network evaluation, small so partials and endpoints follow the audio closely
+        decodable_opts.frames_per_chunk = 20
+        endpoint_opts = OnlineEndpointConfig()
+        # the endpoint rules count trailing silence by these phones
+        with open(self.__dir_path + "/aspire_new/modified/lang/phones/silence.csl") as fp:
+            endpoint_opts.silence_phones = fp.read().strip()
+        asr = NnetLatticeFasterOnlineRecognizer.from_files(
+            self.__dir_path + "/aspire_new/exp/tdnn_7b_chain_online/final.mdl",
+            self.__dir_path + "/aspire_new/modified/graph/HCLG.fst",
+            self.__dir_path + "/aspire_new/modified/lang/words.txt",
+            decoder_opts=decoder_opts,
+            decodable_opts=decodable_opts,
+            endpoint_opts=endpoint_opts)
         return asr